@@ -1,50 +1,307 @@
 import os
+import io
 import json
 from dotenv import load_dotenv
-from openai import OpenAI
 
 # Rich imports for beautiful terminal UI
 from rich.console import Console
 from rich.panel import Panel
 from rich.text import Text
-from rich.live import Live
 from rich.spinner import Spinner
 from rich.columns import Columns
 from rich.align import Align
 from rich.table import Table
-from rich.markdown import Markdown
-from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.rule import Rule
 from rich.box import ROUNDED, HEAVY, DOUBLE
 import time
 
-# Import the packages of 3 tools we have just created 
-import src.tools.check_weather.weather_checking as check_weather
-from src.tools.image_crawler.ImageCrawler import AutoCrawler
-import src.tools.my_calculator.calculator as calculator 
+from src.tools.registry import lazy_module, preload
+
+# Heavy modules are imported on first use instead of at startup (see src/tools/registry.py):
+# the OpenAI SDK, the HTTP clients, numpy for calculator batches, Pillow for images
+asyncio = lazy_module("asyncio")
+openai = lazy_module("openai")
+rich_live = lazy_module("rich.live")
+rich_markdown = lazy_module("rich.markdown")
+rich_progress = lazy_module("rich.progress")
+http_transport = lazy_module("src.transport.http_transport")
+
+# The packages of 3 tools we have just created, loaded when a tool is first used
+check_weather = lazy_module("src.tools.check_weather.weather_checking")
+ImageCrawler = lazy_module("src.tools.image_crawler.ImageCrawler")
+search_backends = lazy_module("src.tools.image_crawler.search_backends")
+derivatives = lazy_module("src.tools.image_crawler.derivatives")
+calculator = lazy_module("src.tools.my_calculator.calculator")
+calculator_batch = lazy_module("src.tools.my_calculator.batch")
+sandbox = lazy_module("src.tools.my_calculator.sandbox")
+
+# Light modules; Selenium is only imported when a browser is launched
+from src.tools.image_crawler.browser_pool import BrowserPool
+from src.tools.image_crawler.download_jobs import ImageJob, ImageJobQueue
+from src.chatbot.routing_cache import RoutingCache
+from src.chatbot.fast_router import FastRouter
+from src.chatbot.history import ConversationHistory
 
 # Load the API key getting from openrouter
 load_dotenv()
 openai_api_key = os.getenv("OPENROUTER_API_KEY")
+# Override to point the chatbot at another OpenAI-compatible server (e.g. a local stub)
+openai_base_url = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+
+# Set CHATBOT_NATIVE_TOOLS=1 to route tools through native function calling
+native_tools_enabled = os.getenv("CHATBOT_NATIVE_TOOLS", "0") == "1"
+
+# Set CHATBOT_STREAM=1 to render replies progressively as tokens arrive
+stream_enabled = os.getenv("CHATBOT_STREAM", "0") == "1"
+
+# Set CHATBOT_HISTORY=1 to send the bounded conversation history with each prompt
+history_enabled = os.getenv("CHATBOT_HISTORY", "0") == "1"
+
+# Optional SQLite file that keeps routing decisions across restarts
+routing_cache_db = os.getenv("CHATBOT_ROUTING_CACHE_DB")
+
+# Set CALCULATOR_SANDBOX=1 to evaluate expressions in worker processes with CPU/memory limits
+calculator_sandbox_enabled = os.getenv("CALCULATOR_SANDBOX", "0") == "1"
+
+# Headless browsers kept open for the image tool, and searches before each one is replaced
+image_browser_pool_size = int(os.getenv("IMAGE_BROWSER_POOL_SIZE", "1"))
+image_browser_max_uses = int(os.getenv("IMAGE_BROWSER_MAX_USES", "50"))
+
+# Where image links come from: "selenium" (default), or opt-in "auto" (plain HTTP, browser as fallback) or "http"
+image_search_backend = os.getenv("IMAGE_SEARCH_BACKEND", "selenium")
+
+# Set IMAGE_JOBS=1 to download images in background jobs while the chat goes on
+image_jobs_enabled = os.getenv("IMAGE_JOBS", "0") == "1"
+
+# Comma-separated preview sizes (e.g. "256,512") to render after each image download; empty disables
+image_thumbnail_sizes = [int(size) for size in os.getenv("IMAGE_THUMBNAILS", "").split(",") if size.strip()]
+image_thumbnail_format = os.getenv("IMAGE_THUMBNAIL_FORMAT", "webp")
+image_thumbnail_quality = int(os.getenv("IMAGE_THUMBNAIL_QUALITY", "80"))
+
+
+def make_derivative_generator():
+    """DerivativeGenerator for the IMAGE_THUMBNAILS settings, or None when previews are off"""
+    if not image_thumbnail_sizes:
+        return None
+    return derivatives.DerivativeGenerator(sizes=image_thumbnail_sizes, ext=image_thumbnail_format,
+                               quality=image_thumbnail_quality)
+
+MODEL_NAME = "qwen/qwen2.5-vl-32b-instruct:free"
+
+# The SDK retries with its own exponential backoff on 429/5xx and connection errors
+OPENAI_MAX_RETRIES = 3
+
+# How often the streaming panel re-renders its markdown
+STREAM_REFRESH_PER_SECOND = 8
 
 # Initialize Rich console
 console = Console()
 
+# Tool definitions for the OpenAI `tools` / `tool_calls` interface
+TOOL_SCHEMAS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "calculator",
+            "description": "Evaluate a mathematical expression. Convert natural language math into a Python-style expression first, e.g. '989 times 9909' -> '989 * 9909', 'square root of 16' -> '16 ** 0.5'. For many values at once, give an expression template with variables (e.g. 'x * 1.1') and their values, or a list of expressions.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "expression": {"type": "string", "description": "Expression using numbers and + - * / ( ) ** only, or a template using the names in 'variables'"},
+                    "exact": {
+                        "type": "string",
+                        "enum": ["fraction", "decimal"],
+                        "description": "Only when the user asks for an exact answer: fraction (e.g. 1/3) or decimal arithmetic"
+                    },
+                    "variables": {
+                        "type": "object",
+                        "additionalProperties": {"type": "array", "items": {"type": "number"}},
+                        "description": "Variable name -> list of values for a batch template, e.g. {'x': [10, 20, 30]}"
+                    },
+                    "expressions": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Several independent expressions to evaluate at once"
+                    }
+                }
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "weather",
+            "description": "Get the current weather for one city (location) or several cities at once (locations).",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "location": {"type": "string", "description": "City name, e.g. 'Melbourne'"},
+                    "locations": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Several city names, e.g. ['Tokyo', 'Paris']"
+                    }
+                }
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "images",
+            "description": "Download images from Google for a keyword.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "keyword": {"type": "string", "description": "Search keyword, e.g. 'cats'"},
+                    "count": {"type": "integer", "description": "Number of images to download", "default": 5}
+                },
+                "required": ["keyword"]
+            }
+        }
+    }
+]
+
+# System prompt for the JSON routing step in analyze_message
+ROUTING_SYSTEM_PROMPT = """You are an intelligent assistant that can use 3 tools:
+
+1. CALCULATOR: For math calculations - you MUST convert natural language math questions into proper mathematical expressions
+2. WEATHER: For weather information - needs a city name
+3. IMAGE_DOWNLOADER: For downloading images from Google - needs a keyword and count
+
+IMPORTANT FOR CALCULATOR: When users ask math questions in natural language, you MUST convert them to proper mathematical expressions:
+- "989 times with 9909" → "989 * 9909"
+- "what is 50 plus 25" → "50 + 25"
+- "divide 100 by 4" → "100 / 4"
+- "5 to the power of 3" → "5 ** 3"
+- "square root of 16" → "16 ** 0.5"
+- "what's 15 minus 8" → "15 - 8"
+
+Your job is to analyze the user's message and decide what to do. Respond with ONLY a JSON object:
+
+For direct tool use (when user clearly wants calculation/weather/images):
+{"action": "use_tool", "tool": "calculator", "params": {"expression": "989 * 9909"}}
+{"action": "use_tool", "tool": "weather", "params": {"location": "Melbourne"}}
+{"action": "use_tool", "tool": "weather", "params": {"locations": ["Tokyo", "Paris"]}}
+{"action": "use_tool", "tool": "images", "params": {"keyword": "cats", "count": 5}}
+
+For suggesting tools (when user mentions something that could use a tool):
+{"action": "suggest_tool", "tool": "images", "suggestion": "Would you like me to download some cat pictures?"}
+
+For asking clarification (when tool info is missing):
+{"action": "ask_clarification", "tool": "weather", "question": "What city would you like weather information for?"}
+{"action": "ask_clarification", "tool": "images", "question": "How many pictures would you like me to download?"}
+
+For normal chat (no tools needed):
+{"action": "chat", "response": "Your normal conversational response here"}
+
+Math question examples:
+- "What's 5 + 3?" → {"action": "use_tool", "tool": "calculator", "params": {"expression": "5 + 3"}}
+- "989 times with 9909" → {"action": "use_tool", "tool": "calculator", "params": {"expression": "989 * 9909"}}
+- "What is the result of 50 divided by 2?" → {"action": "use_tool", "tool": "calculator", "params": {"expression": "50 / 2"}}
+- "Calculate 15 plus 25 minus 10" → {"action": "use_tool", "tool": "calculator", "params": {"expression": "15 + 25 - 10"}}
+- "Add 10% to these prices: 10, 20, 35" → {"action": "use_tool", "tool": "calculator", "params": {"expression": "x * 1.1", "variables": {"x": [10, 20, 35]}}}
+
+Weather examples:
+- "Weather in Tokyo" → use weather directly  
+- "Weather in Tokyo and Paris" → use weather with "locations"
+- "What's the weather?" → ask for city
+
+Image examples:
+- "Download 10 cat images" → use images directly
+- "I love dogs" → suggest images
+- "Download some pictures" → ask for keyword and count
+
+Chat examples:
+- "How are you?" → normal chat
+- "Tell me a joke" → normal chat
+"""
+
+NATIVE_SYSTEM_PROMPT = """You are a friendly chatbot that can use 3 tools: calculator, weather and images.
+Call a tool when the user clearly wants a calculation, weather information or images.
+If information needed for a tool is missing (e.g. no city for weather), ask the user for it instead of guessing.
+Otherwise respond naturally and conversationally. When a tool has been used, incorporate its result into your answer."""
+
+def make_async_openai_client():
+    """AsyncOpenAI client on the shared pooled transport settings"""
+    return openai.AsyncOpenAI(
+        base_url=openai_base_url,
+        api_key=openai_api_key,
+        http_client=http_transport.make_async_http_client(),
+        max_retries=OPENAI_MAX_RETRIES,
+    )
+
+
+class StreamedResponse(str):
+    """Response text that was already rendered to the console while streaming"""
+
+
 class IntelligentChatbot:
-    def __init__(self):
-        self.client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=openai_api_key,
-        )
-        self.conversation_history = []
+    def __init__(self, native_tools=False, stream=False, client=None, output_console=None,
+                 routing_cache=None, fast_router=None, use_history=False, history_max_tokens=1500,
+                 calculator_sandbox=None, browser_pool=None, image_crawler=None, background_images=False,
+                 image_jobs=None):
+        # A client can be injected so several chatbots (e.g. server sessions) share one pool;
+        # otherwise it is created (and the SDK imported) on the first model call
+        self._client = client
+        self.console = output_console or console
+        self.model = MODEL_NAME
+        self.native_tools = native_tools  # Use tools/tool_calls instead of JSON routing
+        self.stream = stream  # Render replies token by token in a live panel
+        self.routing_cache = routing_cache  # Optional RoutingCache for analyze_message
+        self.fast_router = fast_router  # Optional FastRouter tried before analyze_message
+        self.calculator_sandbox = calculator_sandbox  # Optional CalculatorSandbox for the calculator tool
+        # Bounded history; only sent to the model when use_history is set
+        self.conversation_history = ConversationHistory(max_tokens=history_max_tokens)
+        self.use_history = use_history
         self.pending_action = None  # Store pending tool suggestions
         
-        # Initialize image crawler
-        self.image_crawler = AutoCrawler(
-            download_path='downloaded_images',
-            full_resolution=False,
-            no_gui=True
-        )
+        # The image crawler is built on the first image request; a shared BrowserPool keeps Chrome
+        # warm between requests, and a shared crawler (e.g. across server sessions) also shares its image store
+        self._image_crawler = image_crawler
+        self.browser_pool = browser_pool
+        # With background images, downloads run as jobs and the chat reports them when they finish
+        self._image_jobs = image_jobs
+        self.background_images = background_images
+        self.jobs = []  # This chatbot's jobs that have not been reported yet
+    
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = openai.OpenAI(
+                base_url=openai_base_url,
+                api_key=openai_api_key,
+                http_client=http_transport.make_http_client(),
+                max_retries=OPENAI_MAX_RETRIES,
+            )
+        return self._client
+    
+    @property
+    def image_crawler(self):
+        if self._image_crawler is None:
+            self._image_crawler = ImageCrawler.AutoCrawler(
+                download_path='downloaded_images',
+                full_resolution=False,
+                no_gui=True,
+                browser_pool=self.browser_pool,
+                search_backends=search_backends.make_search_backends(image_search_backend, self.browser_pool)
+                if self.browser_pool else None,
+                derivatives=make_derivative_generator()
+            )
+        return self._image_crawler
+    
+    @property
+    def image_jobs(self):
+        if self._image_jobs is None and self.background_images:
+            self._image_jobs = ImageJobQueue(self.image_crawler)
+        return self._image_jobs
+    
+    def close(self):
+        """Stop the job queue and preview workers this chatbot started (shared ones are left running)"""
+        if self._image_jobs is not None and self.background_images:
+            self._image_jobs.close()
+        if self._image_crawler is not None and self._image_crawler.derivatives is not None:
+            self._image_crawler.derivatives.close()
     
     def display_tool_activation(self, tool_name, params):
         """Display a special indicator when a tool is being activated"""
@@ -81,23 +338,32 @@ class IntelligentChatbot:
         # Create parameters display
         param_text = ""
         if tool_name == "calculator":
-            param_text = f"Expression: {params.get('expression', 'N/A')}"
+            if params.get("expressions"):
+                param_text = f"Expressions: {len(params['expressions'])} at once"
+            elif params.get("variables"):
+                rows = max((len(values) for values in params["variables"].values()), default=0)
+                param_text = f"Expression: {params.get('expression', 'N/A')} over {rows} values"
+            else:
+                param_text = f"Expression: {params.get('expression', 'N/A')}"
         elif tool_name == "weather":
-            param_text = f"Location: {params.get('location', 'N/A')}"
+            if params.get("locations"):
+                param_text = f"Locations: {', '.join(params['locations'])}"
+            else:
+                param_text = f"Location: {params.get('location', 'N/A')}"
         elif tool_name == "images":
             param_text = f"Keyword: {params.get('keyword', 'N/A')}, Count: {params.get('count', 5)}"
         
         params_display = Text(param_text, style="italic", justify="center")
         
         # Display the activation banner
-        console.print(Rule(style=config['color']))
-        console.print(Panel(
+        self.console.print(Rule(style=config['color']))
+        self.console.print(Panel(
             Text.assemble(tool_text, "\n", params_display),
             style=config['color'],
             box=config['box'],
             padding=(1, 2)
         ))
-        console.print(Rule(style=config['color']))
+        self.console.print(Rule(style=config['color']))
     
     def display_tool_result(self, tool_name, result, success=True):
         """Display tool execution result with special formatting"""
@@ -122,8 +388,8 @@ class IntelligentChatbot:
         if hasattr(result, 'add_row'):
             header = Text(f"{config['icon']} {status_icon} TOOL RESULT: {status_text}", 
                          style=border_style, justify="center")
-            console.print(Panel(header, style=border_style, box=DOUBLE))
-            console.print(Panel(result, title=f"{config['icon']} Weather Information", 
+            self.console.print(Panel(header, style=border_style, box=DOUBLE))
+            self.console.print(Panel(result, title=f"{config['icon']} Weather Information", 
                                title_align="left", style=config['color'], padding=(1, 2)))
         else:
             # For text results
@@ -133,79 +399,37 @@ class IntelligentChatbot:
                 "\n\n",
                 Text(str(result), style="white")
             )
-            console.print(Panel(result_display, style=border_style, box=DOUBLE, padding=(1, 2)))
+            self.console.print(Panel(result_display, style=border_style, box=DOUBLE, padding=(1, 2)))
     
     def analyze_message(self, user_message):
         """Step 1: Analyze user message and decide what action to take"""
         
-        system_prompt = """You are an intelligent assistant that can use 3 tools:
-
-1. CALCULATOR: For math calculations - you MUST convert natural language math questions into proper mathematical expressions
-2. WEATHER: For weather information - needs a city name
-3. IMAGE_DOWNLOADER: For downloading images from Google - needs a keyword and count
-
-IMPORTANT FOR CALCULATOR: When users ask math questions in natural language, you MUST convert them to proper mathematical expressions:
-- "989 times with 9909" → "989 * 9909"
-- "what is 50 plus 25" → "50 + 25"
-- "divide 100 by 4" → "100 / 4"
-- "5 to the power of 3" → "5 ** 3"
-- "square root of 16" → "16 ** 0.5"
-- "what's 15 minus 8" → "15 - 8"
-
-Your job is to analyze the user's message and decide what to do. Respond with ONLY a JSON object:
-
-For direct tool use (when user clearly wants calculation/weather/images):
-{"action": "use_tool", "tool": "calculator", "params": {"expression": "989 * 9909"}}
-{"action": "use_tool", "tool": "weather", "params": {"location": "Melbourne"}}
-{"action": "use_tool", "tool": "images", "params": {"keyword": "cats", "count": 5}}
-
-For suggesting tools (when user mentions something that could use a tool):
-{"action": "suggest_tool", "tool": "images", "suggestion": "Would you like me to download some cat pictures?"}
-
-For asking clarification (when tool info is missing):
-{"action": "ask_clarification", "tool": "weather", "question": "What city would you like weather information for?"}
-{"action": "ask_clarification", "tool": "images", "question": "How many pictures would you like me to download?"}
-
-For normal chat (no tools needed):
-{"action": "chat", "response": "Your normal conversational response here"}
-
-Math question examples:
-- "What's 5 + 3?" → {"action": "use_tool", "tool": "calculator", "params": {"expression": "5 + 3"}}
-- "989 times with 9909" → {"action": "use_tool", "tool": "calculator", "params": {"expression": "989 * 9909"}}
-- "What is the result of 50 divided by 2?" → {"action": "use_tool", "tool": "calculator", "params": {"expression": "50 / 2"}}
-- "Calculate 15 plus 25 minus 10" → {"action": "use_tool", "tool": "calculator", "params": {"expression": "15 + 25 - 10"}}
-
-Weather examples:
-- "Weather in Tokyo" → use weather directly  
-- "What's the weather?" → ask for city
-
-Image examples:
-- "Download 10 cat images" → use images directly
-- "I love dogs" → suggest images
-- "Download some pictures" → ask for keyword and count
-
-Chat examples:
-- "How are you?" → normal chat
-- "Tell me a joke" → normal chat
-"""
-
+        # Repeated routing questions skip the round-trip entirely
+        if self.routing_cache is not None and not self.use_history:
+            cached = self.routing_cache.get(self.model, user_message)
+            if cached is not None:
+                return cached
+        
         try:
             # Show thinking spinner
-            with console.status("[bold green]🤔 Thinking...", spinner="dots"):
+            with self.console.status("[bold green]🤔 Thinking...", spinner="dots"):
                 response = self.client.chat.completions.create(
-                    model="qwen/qwen2.5-vl-32b-instruct:free",
+                    model=self.model,
                     messages=[
-                        {"role": "system", "content": system_prompt},
+                        {"role": "system", "content": ROUTING_SYSTEM_PROMPT},
+                        *self.history_messages(),
                         {"role": "user", "content": user_message}
                     ],
                     temperature=0.1
                 )
             
-            analysis = response.choices[0].message.content.strip()
-            return json.loads(analysis)
+            analysis = json.loads(response.choices[0].message.content.strip())
+            if self.routing_cache is not None and not self.use_history:
+                self.routing_cache.set(self.model, user_message, analysis)
+            return analysis
             
         except Exception as e:
-            console.print(f"[red]Error in analysis: {e}[/red]")
+            self.console.print(f"[red]Error in analysis: {e}[/red]")
             return {"action": "chat", "response": "Sorry, I had trouble understanding that. Could you try again?"}
     
     def execute_tool(self, tool, params):
@@ -216,68 +440,207 @@ Chat examples:
         
         try:
             if tool == "calculator":
-                with console.status(f"[bold blue]🧮 Calculating {params['expression']}...", spinner="dots"):
-                    result = calculator.calculator_tool(params["expression"])
-                
-                if result["error"]:
-                    error_msg = f"Sorry, I couldn't calculate that: {result['error']}"
-                    self.display_tool_result(tool, error_msg, success=False)
-                    return error_msg
-                else:
-                    success_msg = f"The answer is: {result['result']}"
-                    self.display_tool_result(tool, success_msg, success=True)
-                    return success_msg
+                with self.console.status("[bold blue]🧮 Calculating...", spinner="dots"):
+                    result = self.run_calculator(params)
             
             elif tool == "weather":
-                with console.status(f"[bold cyan]🌤️ Getting weather for {params['location']}...", spinner="weather"):
-                    result = check_weather.get_weather_info(params["location"])
-                
-                if "error" in result:
-                    error_msg = f"Sorry, I couldn't get weather info: {result['error']}"
-                    self.display_tool_result(tool, error_msg, success=False)
-                    return error_msg
-                else:
-                    # Create a beautiful weather table
-                    weather_table = Table(show_header=False, box=None, padding=(0, 1))
-                    weather_table.add_column("Icon", style="bold")
-                    weather_table.add_column("Info", style="")
-                    
-                    weather_table.add_row("🌍", f"[bold]{result['location']}, {result['country']}[/bold]")
-                    weather_table.add_row("🌡️", f"Temperature: [bold cyan]{result['temperature']}°C[/bold cyan] (feels like {result['feels_like']}°C)")
-                    weather_table.add_row("☁️", f"Conditions: [bold yellow]{result['description']}[/bold yellow]")
-                    weather_table.add_row("💧", f"Humidity: [bold blue]{result['humidity']}%[/bold blue]")
-                    weather_table.add_row("🌬️", f"Wind: [bold green]{result['wind_speed']} km/h[/bold green]")
-                    weather_table.add_row("👁️", f"Visibility: [bold magenta]{result['visibility']} km[/bold magenta]")
-                    
-                    self.display_tool_result(tool, weather_table, success=True)
-                    return weather_table
+                locations = self.weather_locations(params)
+                with self.console.status(f"[bold cyan]🌤️ Getting weather for {', '.join(locations)}...", spinner="weather"):
+                    if len(locations) > 1:
+                        result = check_weather.get_weather_batch(locations)
+                    else:
+                        result = check_weather.get_weather_info(locations[0])
             
             elif tool == "images":
                 keyword = params["keyword"]
                 count = params.get("count", 5)
                 
-                with Progress(
-                    SpinnerColumn(),
-                    TextColumn("[progress.description]{task.description}"),
-                    console=console
-                ) as progress:
-                    task = progress.add_task(f"🖼️ Downloading {count} images of '{keyword}'...", total=None)
-                    success = self.image_crawler.download_keyword_images(keyword, count)
-                
-                if success:
-                    success_msg = f"✅ Successfully downloaded [bold green]{count}[/bold green] images of '[bold cyan]{keyword}[/bold cyan]'! Check the 'downloaded_images/{keyword}/' folder."
-                    self.display_tool_result(tool, success_msg, success=True)
-                    return success_msg
+                if self.image_jobs is not None:
+                    result = self.submit_image_job(params)
                 else:
-                    error_msg = f"❌ Sorry, I couldn't download images of '{keyword}' right now."
-                    self.display_tool_result(tool, error_msg, success=False)
-                    return error_msg
+                    with rich_progress.Progress(
+                        rich_progress.SpinnerColumn(),
+                        rich_progress.TextColumn("[progress.description]{task.description}"),
+                        rich_progress.MofNCompleteColumn(),
+                        console=self.console
+                    ) as progress:
+                        task = progress.add_task(f"🖼️ Downloading {count} images of '{keyword}'...", total=count)
+                        
+                        def update(event, **data):
+                            if event == "started":
+                                progress.update(task, completed=data["existing"])
+                            elif event == "saved":
+                                progress.advance(task)
+                        
+                        result = self.image_crawler.download_keyword_images(keyword, count, progress=update)
+            
+            else:
+                return None
+            
+            return self.present_tool_result(tool, params, result)
         
         except Exception as e:
             error_msg = f"❌ Sorry, I'm currently unavailable for this request."
             self.display_tool_result(tool, error_msg, success=False)
             return error_msg
     
+    def present_tool_result(self, tool, params, result):
+        """Turn a raw tool result into the chatbot's message (or weather table) and display it"""
+        if tool == "calculator":
+            if "results" in result:
+                return self.present_calculator_batch(result)
+            
+            if result["error"]:
+                error_msg = f"Sorry, I couldn't calculate that: {result['error']}"
+                self.display_tool_result(tool, error_msg, success=False)
+                return error_msg
+            else:
+                success_msg = f"The answer is: {result['result']}"
+                self.display_tool_result(tool, success_msg, success=True)
+                return success_msg
+        
+        elif tool == "weather":
+            if len(self.weather_locations(params)) > 1:
+                return self.present_weather_batch(result)
+            
+            if "error" in result:
+                error_msg = f"Sorry, I couldn't get weather info: {result['error']}"
+                self.display_tool_result(tool, error_msg, success=False)
+                return error_msg
+            else:
+                # Create a beautiful weather table
+                weather_table = Table(show_header=False, box=None, padding=(0, 1))
+                weather_table.add_column("Icon", style="bold")
+                weather_table.add_column("Info", style="")
+                
+                weather_table.add_row("🌍", f"[bold]{result['location']}, {result['country']}[/bold]")
+                weather_table.add_row("🌡️", f"Temperature: [bold cyan]{result['temperature']}°C[/bold cyan] (feels like {result['feels_like']}°C)")
+                weather_table.add_row("☁️", f"Conditions: [bold yellow]{result['description']}[/bold yellow]")
+                weather_table.add_row("💧", f"Humidity: [bold blue]{result['humidity']}%[/bold blue]")
+                weather_table.add_row("🌬️", f"Wind: [bold green]{result['wind_speed']} km/h[/bold green]")
+                weather_table.add_row("👁️", f"Visibility: [bold magenta]{result['visibility']} km[/bold magenta]")
+                
+                self.display_tool_result(tool, weather_table, success=True)
+                return weather_table
+        
+        elif tool == "images":
+            keyword = params["keyword"]
+            count = params.get("count", 5)
+            
+            if isinstance(result, ImageJob):
+                started_msg = (f"🕒 Started job {result.id}: downloading {count} images of '{keyword}' "
+                               f"in the background. I'll let you know when it's done.")
+                self.display_tool_result(tool, started_msg, success=True)
+                return started_msg
+            elif result:
+                success_msg = f"✅ Successfully downloaded [bold green]{count}[/bold green] images of '[bold cyan]{keyword}[/bold cyan]'! Check the 'downloaded_images/{ImageCrawler.normalize_keyword(keyword)}/' folder."
+                self.display_tool_result(tool, success_msg, success=True)
+                return success_msg
+            else:
+                error_msg = f"❌ Sorry, I couldn't download images of '{keyword}' right now."
+                self.display_tool_result(tool, error_msg, success=False)
+                return error_msg
+    
+    def submit_image_job(self, params):
+        """Queue an image download and remember it so its completion is reported later"""
+        job = self.image_jobs.submit(params["keyword"], params.get("count", 5))
+        self.jobs.append(job)
+        return job
+    
+    def report_finished_jobs(self):
+        """Display every job of this chatbot that finished since the last report"""
+        finished = []
+        for job in list(self.jobs):
+            if job.finished.is_set():
+                self.jobs.remove(job)
+                finished.append(job)
+        
+        for job in finished:
+            if job.status == "done":
+                message = (f"✅ Job {job.id} finished: {job.total} images of '{job.keyword}' are in "
+                           f"'downloaded_images/{ImageCrawler.normalize_keyword(job.keyword)}/' ({job.saved} new).")
+            else:
+                message = f"❌ Job {job.id} for '{job.keyword}' failed: {job.error}"
+            self.display_tool_result("images", message, success=job.status == "done")
+        return finished
+    
+    def run_calculator(self, params):
+        """Run a single calculation, or a batch when variables/expressions are given"""
+        if params.get("expressions") or params.get("variables"):
+            if self.calculator_sandbox:
+                batch = self.calculator_sandbox.calculate_batch
+            else:
+                batch = calculator_batch.calculator_batch
+            return batch(
+                expression=params.get("expression"),
+                bindings=params.get("variables"),
+                expressions=params.get("expressions")
+            )
+        if self.calculator_sandbox:
+            return self.calculator_sandbox.calculate(params["expression"], params.get("exact"))
+        return calculator.calculator_tool(params["expression"], params.get("exact"))
+    
+    def present_calculator_batch(self, result, preview_rows=20):
+        """Summarize a batch calculation: a preview of the values plus failed rows"""
+        if result["error"]:
+            error_msg = f"Sorry, I couldn't calculate that: {result['error']}"
+            self.display_tool_result("calculator", error_msg, success=False)
+            return error_msg
+        
+        values = list(result["results"])
+        errors = result["errors"]
+        preview = ", ".join("error" if row in errors else f"{value:g}" for row, value in enumerate(values[:preview_rows]))
+        if len(values) > preview_rows:
+            preview += f", ... ({len(values) - preview_rows} more)"
+        
+        success_msg = f"Computed {len(values)} values: [{preview}]"
+        if errors:
+            failed = "; ".join(f"row {row}: {message}" for row, message in list(errors.items())[:5])
+            success_msg += f"\n{len(errors)} failed ({failed}{'; ...' if len(errors) > 5 else ''})"
+        
+        self.display_tool_result("calculator", success_msg, success=len(errors) < len(values))
+        return success_msg
+    
+    @staticmethod
+    def weather_locations(params):
+        """Return the list of locations a weather call asks for"""
+        locations = params.get("locations") or [params["location"]]
+        return check_weather.unique_locations(locations)
+    
+    def present_weather_batch(self, results):
+        """Render a batch weather lookup as one combined table"""
+        if all("error" in info for info in results.values()):
+            errors = "; ".join(f"{location}: {info['error']}" for location, info in results.items())
+            error_msg = f"Sorry, I couldn't get weather info: {errors}"
+            self.display_tool_result("weather", error_msg, success=False)
+            return error_msg
+        
+        weather_table = Table(box=ROUNDED, padding=(0, 1))
+        weather_table.add_column("🌍 Location", style="bold")
+        weather_table.add_column("🌡️ Temp", justify="right", style="bold cyan")
+        weather_table.add_column("Feels like", justify="right")
+        weather_table.add_column("☁️ Conditions", style="bold yellow")
+        weather_table.add_column("💧 Humidity", justify="right", style="bold blue")
+        weather_table.add_column("🌬️ Wind", justify="right", style="bold green")
+        weather_table.add_column("👁️ Visibility", justify="right", style="bold magenta")
+        
+        for location, info in results.items():
+            if "error" in info:
+                weather_table.add_row(location, "-", "-", f"[red]{info['error']}[/red]", "-", "-", "-")
+            else:
+                weather_table.add_row(
+                    f"{info['location']}, {info['country']}",
+                    f"{info['temperature']}°C",
+                    f"{info['feels_like']}°C",
+                    info['description'],
+                    f"{info['humidity']}%",
+                    f"{info['wind_speed']} km/h",
+                    f"{info['visibility']} km"
+                )
+        
+        self.display_tool_result("weather", weather_table, success=True)
+        return weather_table
+    
     def generate_response(self, user_message, tool_result=None):
         """Step 2: Generate natural response, optionally including tool results"""
         
@@ -289,29 +652,254 @@ Chat examples:
             system_prompt = "You are a friendly chatbot. Respond naturally and conversationally to the user's message."
         
         try:
-            with console.status("[bold green]✨ Generating response...", spinner="dots"):
-                response = self.client.chat.completions.create(
-                    model="qwen/qwen2.5-vl-32b-instruct:free",
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": context}
-                    ],
-                    temperature=0.7
-                )
+            content, _ = self.request_completion(
+                [
+                    {"role": "system", "content": system_prompt},
+                    *self.history_messages(),
+                    {"role": "user", "content": context}
+                ],
+                0.7,
+                "[bold green]✨ Generating response..."
+            )
             
-            return response.choices[0].message.content
+            return content
             
         except Exception as e:
             return "Sorry, I'm having trouble responding right now."
     
+    def tool_result_to_text(self, tool_result):
+        """Convert a tool result (text or rich Table) into plain text for the model"""
+        if hasattr(tool_result, 'add_row'):
+            capture = Console(file=io.StringIO(), no_color=True, width=100)
+            capture.print(tool_result)
+            return capture.file.getvalue().strip()
+        return str(tool_result)
+    
+    def request_completion(self, messages, temperature, status_text, **kwargs):
+        """Run one completion, streaming it into a live panel when enabled.
+        
+        Returns:
+            tuple: (content, tool_calls) where tool_calls is a list of
+            {"id", "name", "arguments"} dicts. Streamed content comes back as a
+            StreamedResponse since it has already been displayed.
+        """
+        if self.stream:
+            return self.stream_completion(messages, temperature, status_text, **kwargs)
+        
+        with self.console.status(status_text, spinner="dots"):
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                **kwargs
+            )
+        
+        message = response.choices[0].message
+        tool_calls = [
+            {"id": call.id, "name": call.function.name, "arguments": call.function.arguments}
+            for call in message.tool_calls or []
+        ]
+        return message.content, tool_calls
+    
+    def stream_completion(self, messages, temperature, status_text, **kwargs):
+        """Stream a completion, re-rendering the markdown panel as tokens arrive"""
+        content = ""
+        tool_calls = {}
+        live = None
+        last_render = 0.0
+        
+        # Keep the spinner until the first token, then hand over to the live panel
+        status = self.console.status(status_text, spinner="dots")
+        status.start()
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                stream=True,
+                **kwargs
+            )
+            
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                
+                # Tool call names/arguments arrive in fragments keyed by index
+                for call in delta.tool_calls or []:
+                    entry = tool_calls.setdefault(call.index, {"id": None, "name": "", "arguments": ""})
+                    if call.id:
+                        entry["id"] = call.id
+                    if call.function and call.function.name:
+                        entry["name"] += call.function.name
+                    if call.function and call.function.arguments:
+                        entry["arguments"] += call.function.arguments
+                
+                if not delta.content:
+                    continue
+                content += delta.content
+                
+                if live is None:
+                    status.stop()
+                    live = rich_live.Live(build_response_panel(content), console=self.console,
+                                refresh_per_second=STREAM_REFRESH_PER_SECOND)
+                    live.start()
+                    last_render = time.monotonic()
+                elif time.monotonic() - last_render >= 1 / STREAM_REFRESH_PER_SECOND:
+                    # Re-parsing markdown on every token is wasteful, throttle it
+                    live.update(build_response_panel(content))
+                    last_render = time.monotonic()
+            
+            if live is not None:
+                live.update(build_response_panel(content))
+        finally:
+            status.stop()
+            if live is not None:
+                live.stop()
+        
+        ordered_calls = [tool_calls[index] for index in sorted(tool_calls)]
+        return (StreamedResponse(content) if live is not None else content), ordered_calls
+    
+    @staticmethod
+    def parse_tool_call(call):
+        """Return the decoded arguments of a tool call, or None if the call is invalid"""
+        if call["name"] not in ("calculator", "weather", "images"):
+            return None
+        try:
+            params = json.loads(call["arguments"] or "{}")
+        except json.JSONDecodeError:
+            return None
+        return params if isinstance(params, dict) else None
+    
+    @staticmethod
+    def assistant_tool_call_message(content, tool_calls):
+        """Build the assistant message that echoes the model's tool calls back to it"""
+        return {
+            "role": "assistant",
+            "content": content,
+            "tool_calls": [
+                {
+                    "id": call["id"],
+                    "type": "function",
+                    "function": {"name": call["name"], "arguments": call["arguments"]}
+                }
+                for call in tool_calls
+            ]
+        }
+    
+    def chat_with_tools(self, user_message):
+        """Handle a message with native function calling.
+        
+        One completion either answers directly or requests tool calls; after the
+        tools run, a single follow-up completion writes the final answer.
+        """
+        messages = [
+            {"role": "system", "content": NATIVE_SYSTEM_PROMPT},
+            *self.history_messages(),
+            {"role": "user", "content": user_message}
+        ]
+        
+        try:
+            content, tool_calls = self.request_completion(
+                messages, 0.1, "[bold green]🤔 Thinking...",
+                tools=TOOL_SCHEMAS,
+                tool_choice="auto"
+            )
+        except Exception as e:
+            self.console.print(f"[red]Error in analysis: {e}[/red]")
+            return "Sorry, I'm having trouble responding right now."
+        
+        if not tool_calls:
+            return content
+        
+        messages.append(self.assistant_tool_call_message(content, tool_calls))
+        
+        tool_results = []
+        for call in tool_calls:
+            params = self.parse_tool_call(call)
+            if params is None:
+                tool_result = f"Invalid tool call: {call['name']}({call['arguments']})"
+            else:
+                tool_result = self.execute_tool(call["name"], params)
+            
+            tool_results.append(tool_result)
+            messages.append({
+                "role": "tool",
+                "tool_call_id": call["id"],
+                "content": self.tool_result_to_text(tool_result)
+            })
+        
+        # A lone weather table is already displayed, no need for another response
+        if len(tool_results) == 1 and hasattr(tool_results[0], 'add_row'):
+            return "tool_executed"
+        
+        try:
+            content, _ = self.request_completion(
+                messages, 0.7, "[bold green]✨ Generating response...",
+                tools=TOOL_SCHEMAS,
+                tool_choice="none"
+            )
+            return content
+            
+        except Exception as e:
+            return "Sorry, I'm having trouble responding right now."
+    
+    def history_messages(self):
+        """Bounded history to send with a prompt (empty unless use_history is set)"""
+        return self.conversation_history.as_messages() if self.use_history else []
+    
+    def record_turn(self, user_message, response):
+        """Add a finished turn to the bounded history"""
+        self.conversation_history.append({"role": "user", "content": user_message})
+        if response and response != "tool_executed":
+            self.conversation_history.append({"role": "assistant", "content": self.tool_result_to_text(response)})
+    
+    def compact_history(self):
+        """Fold overflowed history into the rolling summary"""
+        if not self.conversation_history.needs_compaction():
+            return
+        
+        # Without history in the prompts a summary is never read, so skip the model call
+        if not self.use_history:
+            self.conversation_history.compact_locally()
+            return
+        
+        try:
+            with self.console.status("[bold green]🗜️ Summarizing conversation...", spinner="dots"):
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=self.conversation_history.compaction_messages(),
+                    temperature=0.3
+                )
+            self.conversation_history.apply_summary(response.choices[0].message.content)
+        except Exception as e:
+            self.conversation_history.compact_locally()
+    
+    def respond(self, user_message):
+        """Answer one user message (pending action or new chat) and update the history"""
+        self.report_finished_jobs()
+        if self.pending_action:
+            response = self.handle_pending_action(user_message)
+        else:
+            response = self.chat(user_message)
+        
+        self.record_turn(user_message, response)
+        self.compact_history()
+        return response
+    
     def chat(self, user_message):
         """Main chat function that handles the complete flow"""
         
-        # Add to conversation history
-        self.conversation_history.append({"role": "user", "content": user_message})
+        # Obvious tool requests are routed locally without a model call
+        analysis = self.fast_router.route(user_message) if self.fast_router else None
+        
+        # Native function calling: routing and answer in one round-trip per step
+        if analysis is None and self.native_tools:
+            return self.chat_with_tools(user_message)
         
         # Step 1: Analyze the message
-        analysis = self.analyze_message(user_message)
+        if analysis is None:
+            analysis = self.analyze_message(user_message)
         
         # Handle different actions
         if analysis["action"] == "use_tool":
@@ -391,6 +979,291 @@ Chat examples:
         keywords = [word for word in words if word not in common_words and len(word) > 2]
         return keywords[-1] if keywords else "images"
 
+class AsyncIntelligentChatbot(IntelligentChatbot):
+    """asyncio variant of IntelligentChatbot.
+    
+    Uses AsyncOpenAI and the async weather fetcher, moves the Selenium crawler
+    to an executor thread, and runs several tool calls from one message
+    concurrently. Native function calling is on by default since that is how
+    the model asks for more than one tool at once.
+    """
+    
+    def __init__(self, native_tools=True, client=None, output_console=None, routing_cache=None,
+                 fast_router=None, use_history=False, history_max_tokens=1500, calculator_sandbox=None,
+                 browser_pool=None, image_crawler=None, background_images=False, image_jobs=None):
+        super().__init__(
+            native_tools=native_tools,
+            stream=False,
+            client=client or make_async_openai_client(),
+            output_console=output_console,
+            routing_cache=routing_cache,
+            fast_router=fast_router,
+            use_history=use_history,
+            history_max_tokens=history_max_tokens,
+            calculator_sandbox=calculator_sandbox,
+            browser_pool=browser_pool,
+            image_crawler=image_crawler,
+            background_images=background_images,
+            image_jobs=image_jobs
+        )
+    
+    async def analyze_message(self, user_message):
+        """Step 1: Analyze user message and decide what action to take"""
+        if self.routing_cache is not None and not self.use_history:
+            cached = self.routing_cache.get(self.model, user_message)
+            if cached is not None:
+                return cached
+        
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": ROUTING_SYSTEM_PROMPT},
+                    *self.history_messages(),
+                    {"role": "user", "content": user_message}
+                ],
+                temperature=0.1
+            )
+            
+            analysis = json.loads(response.choices[0].message.content.strip())
+            if self.routing_cache is not None and not self.use_history:
+                self.routing_cache.set(self.model, user_message, analysis)
+            return analysis
+            
+        except Exception as e:
+            self.console.print(f"[red]Error in analysis: {e}[/red]")
+            return {"action": "chat", "response": "Sorry, I had trouble understanding that. Could you try again?"}
+    
+    async def run_tool(self, tool, params):
+        """Run a tool without blocking the event loop and return its raw result"""
+        if tool == "calculator":
+            if self.calculator_sandbox is None:
+                return self.run_calculator(params)
+            # Evaluation waits in the sandbox's threads, so a slow expression only delays its own session
+            if params.get("expressions") or params.get("variables"):
+                return await self.calculator_sandbox.calculate_batch_async(
+                    expression=params.get("expression"),
+                    bindings=params.get("variables"),
+                    expressions=params.get("expressions")
+                )
+            return await self.calculator_sandbox.calculate_async(params["expression"], params.get("exact"))
+        elif tool == "weather":
+            locations = self.weather_locations(params)
+            if len(locations) > 1:
+                return await check_weather.get_weather_batch_async(locations)
+            return await check_weather.get_weather_info_async(locations[0])
+        elif tool == "images":
+            if self.image_jobs is not None:
+                return self.submit_image_job(params)
+            # Selenium and the image downloads are blocking, keep them off the loop
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None, self.image_crawler.download_keyword_images,
+                params["keyword"], params.get("count", 5)
+            )
+        return None
+    
+    async def execute_tool(self, tool, params):
+        """Execute the specified tool with given parameters"""
+        self.display_tool_activation(tool, params)
+        
+        try:
+            result = await self.run_tool(tool, params)
+            if result is None:
+                return None
+            return self.present_tool_result(tool, params, result)
+        
+        except Exception as e:
+            error_msg = f"❌ Sorry, I'm currently unavailable for this request."
+            self.display_tool_result(tool, error_msg, success=False)
+            return error_msg
+    
+    async def request_completion(self, messages, temperature, status_text=None, **kwargs):
+        """Run one completion and return (content, tool_calls)"""
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            **kwargs
+        )
+        
+        message = response.choices[0].message
+        tool_calls = [
+            {"id": call.id, "name": call.function.name, "arguments": call.function.arguments}
+            for call in message.tool_calls or []
+        ]
+        return message.content, tool_calls
+    
+    async def generate_response(self, user_message, tool_result=None):
+        """Step 2: Generate natural response, optionally including tool results"""
+        
+        context = f"User said: {user_message}"
+        if tool_result:
+            context += f"\nTool result: {tool_result}"
+            system_prompt = "You are a friendly chatbot. The user asked something and you used a tool to help them. Respond naturally and conversationally, incorporating the tool result into your response."
+        else:
+            system_prompt = "You are a friendly chatbot. Respond naturally and conversationally to the user's message."
+        
+        try:
+            content, _ = await self.request_completion(
+                [
+                    {"role": "system", "content": system_prompt},
+                    *self.history_messages(),
+                    {"role": "user", "content": context}
+                ],
+                0.7
+            )
+            
+            return content
+            
+        except Exception as e:
+            return "Sorry, I'm having trouble responding right now."
+    
+    async def chat_with_tools(self, user_message):
+        """Handle a message with native function calling, running tool calls concurrently"""
+        messages = [
+            {"role": "system", "content": NATIVE_SYSTEM_PROMPT},
+            *self.history_messages(),
+            {"role": "user", "content": user_message}
+        ]
+        
+        try:
+            content, tool_calls = await self.request_completion(
+                messages, 0.1,
+                tools=TOOL_SCHEMAS,
+                tool_choice="auto"
+            )
+        except Exception as e:
+            self.console.print(f"[red]Error in analysis: {e}[/red]")
+            return "Sorry, I'm having trouble responding right now."
+        
+        if not tool_calls:
+            return content
+        
+        messages.append(self.assistant_tool_call_message(content, tool_calls))
+        
+        async def run_call(call):
+            params = self.parse_tool_call(call)
+            if params is None:
+                return f"Invalid tool call: {call['name']}({call['arguments']})"
+            return await self.execute_tool(call["name"], params)
+        
+        # e.g. "weather in Tokyo and Paris and 3 cat pictures" runs all three at once
+        tool_results = await asyncio.gather(*(run_call(call) for call in tool_calls))
+        
+        for call, tool_result in zip(tool_calls, tool_results):
+            messages.append({
+                "role": "tool",
+                "tool_call_id": call["id"],
+                "content": self.tool_result_to_text(tool_result)
+            })
+        
+        # A lone weather table is already displayed, no need for another response
+        if len(tool_results) == 1 and hasattr(tool_results[0], 'add_row'):
+            return "tool_executed"
+        
+        try:
+            content, _ = await self.request_completion(
+                messages, 0.7,
+                tools=TOOL_SCHEMAS,
+                tool_choice="none"
+            )
+            return content
+            
+        except Exception as e:
+            return "Sorry, I'm having trouble responding right now."
+    
+    async def compact_history(self):
+        """Fold overflowed history into the rolling summary"""
+        if not self.conversation_history.needs_compaction():
+            return
+        
+        if not self.use_history:
+            self.conversation_history.compact_locally()
+            return
+        
+        try:
+            content, _ = await self.request_completion(self.conversation_history.compaction_messages(), 0.3)
+            self.conversation_history.apply_summary(content)
+        except Exception as e:
+            self.conversation_history.compact_locally()
+    
+    async def respond(self, user_message):
+        """Answer one user message (pending action or new chat) and update the history"""
+        self.report_finished_jobs()
+        if self.pending_action:
+            response = await self.handle_pending_action(user_message)
+        else:
+            response = await self.chat(user_message)
+        
+        self.record_turn(user_message, response)
+        await self.compact_history()
+        return response
+    
+    async def chat(self, user_message):
+        """Main chat function that handles the complete flow"""
+        
+        analysis = self.fast_router.route(user_message) if self.fast_router else None
+        
+        if analysis is None and self.native_tools:
+            return await self.chat_with_tools(user_message)
+        
+        if analysis is None:
+            analysis = await self.analyze_message(user_message)
+        
+        if analysis["action"] == "use_tool":
+            tool_result = await self.execute_tool(analysis["tool"], analysis["params"])
+            
+            if hasattr(tool_result, 'add_row'):
+                return "tool_executed"
+            else:
+                return await self.generate_response(user_message, tool_result)
+            
+        elif analysis["action"] == "suggest_tool":
+            self.pending_action = {"tool": analysis["tool"], "keyword": self.extract_keyword_from_message(user_message)}
+            return analysis["suggestion"]
+            
+        elif analysis["action"] == "ask_clarification":
+            self.pending_action = {"tool": analysis["tool"], "waiting_for": "clarification"}
+            return analysis["question"]
+            
+        else:
+            return analysis["response"]
+    
+    async def handle_pending_action(self, user_response):
+        """Handle responses to tool suggestions or clarification requests"""
+        
+        if not self.pending_action:
+            return await self.chat(user_response)
+        
+        pending = self.pending_action
+        self.pending_action = None
+        
+        if "tool" in pending and "keyword" in pending:
+            if any(word in user_response.lower() for word in ["yes", "yeah", "sure", "ok", "please"]):
+                if pending["tool"] == "images":
+                    try:
+                        count = int(''.join(filter(str.isdigit, user_response)))
+                        if count == 0:
+                            raise ValueError
+                    except:
+                        return "How many pictures would you like me to download?"
+                    
+                    tool_result = await self.execute_tool("images", {"keyword": pending["keyword"], "count": count})
+                    return await self.generate_response(f"download {count} {pending['keyword']} images", tool_result)
+            else:
+                return "No problem! Is there anything else I can help you with?"
+        
+        elif "waiting_for" in pending:
+            if pending["tool"] == "weather":
+                await self.execute_tool("weather", {"location": user_response})
+                return "tool_executed"
+            
+            elif pending["tool"] == "images":
+                return await self.chat(f"download images of {user_response}")
+        
+        return await self.chat(user_response)
+
 def display_startup_banner():
     """Display a beautiful startup banner"""
     console.clear()
@@ -423,28 +1296,34 @@ def display_user_message(message):
     console.print(Panel(user_text, title="👤 You", title_align="left", 
                        style="blue", padding=(0, 1)))
 
+def build_response_panel(response):
+    """Build the chatbot panel for a response (text, markdown or weather table)"""
+    # If response is a Table (weather), display it in a panel
+    if hasattr(response, 'add_row'):
+        return Panel(response, title="🤖 Chatbot", title_align="left", 
+                     style="green", padding=(1, 2))
+    
+    # For text responses, check if it contains markdown-like formatting
+    if any(marker in str(response) for marker in ['**', '*', '_', '`', '#']):
+        # Render as markdown
+        body = rich_markdown.Markdown(str(response))
+    else:
+        # Regular text with rich formatting
+        body = Text(str(response))
+    return Panel(body, title="🤖 Chatbot", title_align="left", 
+                 style="green", padding=(1, 2))
+
 def display_bot_response(response):
     """Display chatbot response with beautiful formatting"""
     # Skip display if tool was executed (already displayed by tool result)
     if response == "tool_executed":
         return
-        
-    # If response is a Table (weather), display it in a panel
-    if hasattr(response, 'add_row'):
-        console.print(Panel(response, title="🤖 Chatbot", title_align="left", 
-                           style="green", padding=(1, 2)))
-    else:
-        # For text responses, check if it contains markdown-like formatting
-        if any(marker in str(response) for marker in ['**', '*', '_', '`', '#']):
-            # Render as markdown
-            md_response = Markdown(str(response))
-            console.print(Panel(md_response, title="🤖 Chatbot", title_align="left", 
-                               style="green", padding=(1, 2)))
-        else:
-            # Regular text with rich formatting
-            bot_text = Text(str(response))
-            console.print(Panel(bot_text, title="🤖 Chatbot", title_align="left", 
-                               style="green", padding=(1, 2)))
+    
+    # Streamed responses were rendered live as they arrived
+    if isinstance(response, StreamedResponse):
+        return
+    
+    console.print(build_response_panel(response))
 
 def get_user_input():
     """Get user input with a beautiful prompt"""
@@ -457,10 +1336,28 @@ def main():
     # Display startup banner
     display_startup_banner()
     
-    chatbot = IntelligentChatbot()
+    # Chrome is launched on the first image request that needs it and then kept open for the next ones
+    browser_pool = BrowserPool(size=image_browser_pool_size, max_uses=image_browser_max_uses)
+    
+    chatbot = IntelligentChatbot(
+        native_tools=native_tools_enabled,
+        stream=stream_enabled,
+        routing_cache=RoutingCache(db_path=routing_cache_db),
+        fast_router=FastRouter(),
+        use_history=history_enabled,
+        calculator_sandbox=sandbox.CalculatorSandbox() if calculator_sandbox_enabled else None,
+        browser_pool=browser_pool,
+        background_images=image_jobs_enabled
+    )
+    
+    # Import the SDK and the reply renderer while the user types the first message
+    preload(["openai", "rich.markdown", "src.transport.http_transport"])
     
     while True:
         try:
+            # Image jobs that finished while the last answer was shown
+            chatbot.report_finished_jobs()
+            
             # Get user input
             user_input = get_user_input().strip()
             
@@ -476,10 +1373,7 @@ def main():
             display_user_message(user_input)
             
             # Get and display bot response
-            if chatbot.pending_action:
-                response = chatbot.handle_pending_action(user_input)
-            else:
-                response = chatbot.chat(user_input)
+            response = chatbot.respond(user_input)
             
             display_bot_response(response)
             
@@ -492,6 +1386,9 @@ def main():
             error_text = Text("Sorry, I encountered an error. Let's try again!", style="bold red")
             console.print(Panel(error_text, title="⚠️ Error", title_align="left", 
                                style="red", padding=(0, 1)))
+    
+    chatbot.close()
+    browser_pool.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
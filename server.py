@@ -0,0 +1,321 @@
+import io
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+from rich.console import Console
+
+from main import (AsyncIntelligentChatbot, make_async_openai_client, routing_cache_db, history_enabled,
+                  calculator_sandbox_enabled, image_browser_pool_size, image_browser_max_uses,
+                  image_search_backend, image_jobs_enabled, make_derivative_generator)
+from src.chatbot.routing_cache import RoutingCache
+from src.chatbot.fast_router import FastRouter
+from src.transport.http_transport import transport_stats
+from src.tools.registry import import_stats
+from src.tools.my_calculator.sandbox import CalculatorSandbox
+from src.tools.image_crawler.browser_pool import BrowserPool
+from src.tools.image_crawler.ImageCrawler import AutoCrawler
+from src.tools.image_crawler.search_backends import make_search_backends
+from src.tools.image_crawler.download_jobs import ImageJobQueue
+from src.tools.check_weather.weather_checking import weather_cache
+
+
+class ServerBusyError(RuntimeError):
+    """max_sessions is reached and every session is in the middle of a turn"""
+
+
+class ChatSession:
+    """Per-session state: its own chatbot (history, pending action) and output capture"""
+
+    def __init__(self, session_id, client, routing_cache=None, fast_router=None, calculator_sandbox=None,
+                 image_crawler=None, image_jobs=None):
+        self.session_id = session_id
+        # Tool panels are recorded instead of printed so they can be sent back to the client
+        self.console = Console(file=io.StringIO(), record=True, width=100, color_system=None)
+        self.chatbot = AsyncIntelligentChatbot(client=client, output_console=self.console,
+                                               routing_cache=routing_cache, fast_router=fast_router,
+                                               use_history=history_enabled,
+                                               calculator_sandbox=calculator_sandbox,
+                                               image_crawler=image_crawler, image_jobs=image_jobs)
+        self.lock = asyncio.Lock()  # One message at a time per session
+        self.last_active = time.monotonic()
+        # Turns handed out by ChatServer.get_session and not finished yet, guarded by sessions_lock
+        self.in_flight = 0
+
+    async def handle_message(self, message):
+        """Run one chat turn and return the reply plus any tool output it displayed"""
+        async with self.lock:
+            self.last_active = time.monotonic()
+
+            response = await self.chatbot.respond(message)
+
+            tool_output = self.console.export_text(clear=True).strip()
+            self.console.file.seek(0)
+            self.console.file.truncate()
+            self.last_active = time.monotonic()
+
+        return {
+            "session_id": self.session_id,
+            "response": None if response == "tool_executed" else response,
+            "tool_output": tool_output or None
+        }
+
+
+class ChatServer:
+    """Session table plus the event loop that runs every session's chatbot.
+
+    HTTP handler threads hand work to a single asyncio loop running in a
+    background thread, so sessions are served concurrently while each session
+    processes its own messages in order.
+    """
+
+    def __init__(self, idle_timeout=900, max_sessions=1000, client=None):
+        """
+        :param idle_timeout: Seconds without messages after which a session is evicted
+        :param max_sessions: Maximum number of live sessions; the idlest one is evicted beyond this
+        :param client: AsyncOpenAI-compatible client shared by all sessions
+        """
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.sessions = {}
+        self.sessions_lock = threading.Lock()
+        self.evicted_count = 0
+
+        self.loop = asyncio.new_event_loop()
+        self.loop_thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.loop_thread.start()
+
+        # One client (and connection pool) shared by every session
+        self.client = client or make_async_openai_client()
+        # Routing decisions are shared too, so one session's repeat query helps every other
+        self.routing_cache = RoutingCache(db_path=routing_cache_db)
+        self.fast_router = FastRouter()
+        # One worker pool for every session's calculations
+        self.calculator_sandbox = CalculatorSandbox() if calculator_sandbox_enabled else None
+        # Sessions lease browsers from one pool instead of each launching Chrome
+        self.browser_pool = BrowserPool(size=image_browser_pool_size, max_uses=image_browser_max_uses)
+        if image_search_backend not in ("http", "auto"):
+            # With the opt-in HTTP backends Chrome only starts as a fallback, if at all
+            self.browser_pool.warm(background=True)
+        # One crawler, so every session saves into the same deduplicating image store
+        self.image_crawler = AutoCrawler(download_path='downloaded_images', no_gui=True,
+                                         browser_pool=self.browser_pool,
+                                         search_backends=make_search_backends(image_search_backend,
+                                                                              self.browser_pool),
+                                         derivatives=make_derivative_generator())
+        # Image downloads run as jobs shared by all sessions; each session reports its own
+        self.image_jobs = ImageJobQueue(self.image_crawler) if image_jobs_enabled else None
+        asyncio.run_coroutine_threadsafe(self._eviction_loop(), self.loop)
+
+    def run(self, coro):
+        """Run a coroutine on the server loop from a handler thread and wait for it"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def get_session(self, session_id=None):
+        """
+        Return the session for session_id, creating a new one if needed
+
+        The session is marked in flight until release_session is called, so it
+        cannot be evicted before its turn takes the session lock. At max_sessions
+        the least recently active idle session is evicted to make room;
+        ServerBusyError is raised if every session is busy.
+        """
+        with self.sessions_lock:
+            if session_id and session_id in self.sessions:
+                session = self.sessions[session_id]
+                session.in_flight += 1
+                session.last_active = time.monotonic()
+                return session
+
+            if len(self.sessions) >= self.max_sessions:
+                # Like evict_idle, never drop a session that has a turn queued or running
+                idle = [session for session in self.sessions.values() if not session.in_flight]
+                if not idle:
+                    raise ServerBusyError("Too many active sessions, try again shortly")
+                idlest = min(idle, key=lambda session: session.last_active)
+                del self.sessions[idlest.session_id]
+                self.evicted_count += 1
+
+            session_id = session_id or uuid.uuid4().hex
+            session = ChatSession(session_id, self.client, self.routing_cache, self.fast_router,
+                                  self.calculator_sandbox, self.image_crawler, self.image_jobs)
+            session.in_flight += 1
+            self.sessions[session_id] = session
+            return session
+
+    def release_session(self, session):
+        """Clear the in-flight mark get_session put on session"""
+        with self.sessions_lock:
+            session.in_flight -= 1
+            session.last_active = time.monotonic()
+
+    def end_session(self, session_id):
+        with self.sessions_lock:
+            return self.sessions.pop(session_id, None) is not None
+
+    def evict_idle(self):
+        """Drop sessions that have been idle longer than idle_timeout"""
+        cutoff = time.monotonic() - self.idle_timeout
+        with self.sessions_lock:
+            expired = [session_id for session_id, session in self.sessions.items()
+                       if session.last_active < cutoff and not session.in_flight]
+            for session_id in expired:
+                del self.sessions[session_id]
+            self.evicted_count += len(expired)
+        return len(expired)
+
+    async def _eviction_loop(self):
+        while True:
+            await asyncio.sleep(max(1, self.idle_timeout / 4))
+            self.evict_idle()
+
+    def chat(self, session_id, message):
+        session = self.get_session(session_id)
+        try:
+            return self.run(session.handle_message(message))
+        finally:
+            self.release_session(session)
+
+    def stats(self):
+        with self.sessions_lock:
+            stats = {"sessions": len(self.sessions), "evicted": self.evicted_count}
+        stats["routing_cache"] = self.routing_cache.stats()
+        stats["fast_router"] = self.fast_router.stats()
+        stats["transport"] = transport_stats()
+        stats["weather_cache"] = weather_cache.stats()
+        stats["lazy_imports"] = import_stats()
+        if self.calculator_sandbox is not None:
+            stats["calculator_sandbox"] = self.calculator_sandbox.stats()
+        stats["browser_pool"] = self.browser_pool.stats()
+        stats["image_store"] = self.image_crawler.image_store.stats()
+        if self.image_jobs is not None:
+            stats["image_jobs"] = self.image_jobs.stats()
+        if self.image_crawler.derivatives is not None:
+            stats["derivatives"] = self.image_crawler.derivatives.stats()
+        return stats
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.loop_thread.join(timeout=5)
+        if self.calculator_sandbox is not None:
+            self.calculator_sandbox.close()
+        if self.image_jobs is not None:
+            self.image_jobs.close()
+        if self.image_crawler.derivatives is not None:
+            self.image_crawler.derivatives.close()
+        self.browser_pool.close()
+        self.image_crawler.close()
+
+
+def make_handler(chat_server):
+    """Build the request handler class bound to a ChatServer"""
+
+    class ChatRequestHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def send_json(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def read_json(self):
+            length = int(self.headers.get("Content-Length", 0))
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == "/health":
+                self.send_json(200, {"status": "ok", **chat_server.stats()})
+            elif url.path.startswith("/jobs/"):
+                self.send_job(url.path[len("/jobs/"):], parse_qs(url.query))
+            else:
+                self.send_json(404, {"error": "Not found"})
+
+        def send_job(self, job_id, query):
+            """Job status plus its progress events; poll with ?since=<last event index>"""
+            job = chat_server.image_jobs.get(job_id) if chat_server.image_jobs is not None else None
+            if job is None:
+                self.send_json(404, {"error": "Unknown job"})
+                return
+            try:
+                since = int(query.get("since", ["0"])[0])
+            except ValueError:
+                since = 0
+            self.send_json(200, {**job.snapshot(), "progress": job.events_since(since)})
+
+        def do_POST(self):
+            if self.path != "/chat":
+                self.send_json(404, {"error": "Not found"})
+                return
+
+            try:
+                payload = self.read_json()
+            except ValueError:
+                payload = None
+            if not isinstance(payload, dict):
+                self.send_json(400, {"error": "Request body must be a JSON object"})
+                return
+
+            message = str(payload.get("message", "")).strip()
+            if not message:
+                self.send_json(400, {"error": "'message' is required"})
+                return
+
+            try:
+                result = chat_server.chat(payload.get("session_id"), message)
+            except ServerBusyError as e:
+                self.send_json(503, {"error": str(e)})
+                return
+            except Exception as e:
+                self.send_json(500, {"error": f"Chat failed: {e}"})
+                return
+            self.send_json(200, result)
+
+        def do_DELETE(self):
+            prefix = "/sessions/"
+            if not self.path.startswith(prefix):
+                self.send_json(404, {"error": "Not found"})
+                return
+
+            if chat_server.end_session(self.path[len(prefix):]):
+                self.send_json(200, {"status": "ended"})
+            else:
+                self.send_json(404, {"error": "Unknown session"})
+
+        def log_message(self, format, *args):
+            pass
+
+    return ChatRequestHandler
+
+
+def serve(host="127.0.0.1", port=8000, idle_timeout=900, max_sessions=1000):
+    """Run the multi-session chat server until interrupted"""
+    chat_server = ChatServer(idle_timeout=idle_timeout, max_sessions=max_sessions)
+    httpd = ThreadingHTTPServer((host, port), make_handler(chat_server))
+    print(f"Chat server listening on http://{host}:{port}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        chat_server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-session HTTP server for the chatbot")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--idle-timeout", type=float, default=900, help="Seconds before an idle session is evicted")
+    parser.add_argument("--max-sessions", type=int, default=1000)
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.idle_timeout, args.max_sessions)
@@ -0,0 +1,138 @@
+import re
+import threading
+
+# Characters a bare arithmetic expression is made of: digits, whitespace and + - * / ( ) . ^
+ALLOWED_PATTERN = r'^[0-9+\-*/().\s^]+$'
+
+# Leading phrases that may wrap a bare arithmetic expression
+MATH_PREFIX = re.compile(r'^(?:what(?:\'s| is)|calculate|compute|evaluate|solve)\s+', re.IGNORECASE)
+
+# An operator after a number: + * / ^, a spaced "-", or a "-" touching parentheses. A bare
+# "-" between digit groups ("2024-10-18", "555-1234") is more likely a date or phone number
+MATH_OPERATOR = re.compile(r'[\d)]\s*[+*/^]|[\d)]\s+-|[\d)]-\s|\)\s*-|\d\s*-\s*\(')
+
+# "1/2/2024" is a date, not a division chain
+SLASH_DATE = re.compile(r'\d+/\d+/\d+')
+
+WEATHER_PATTERN = re.compile(
+    r'^(?:(?:what(?:\'s| is)|how(?:\'s| is))\s+the\s+|show\s+(?:me\s+)?the\s+|check\s+the\s+)?'
+    r'(?:current\s+)?weather\s+(?:like\s+)?(?:in|for|at)\s+(?P<location>[^\d;!?]+?)(?:\s+(?:right\s+)?now)?$',
+    re.IGNORECASE
+)
+
+IMAGES_PATTERN = re.compile(
+    r'^(?:please\s+)?(?:download|get|fetch|grab)\s+(?:me\s+)?(?P<count>\d{1,3})\s+'
+    r'(?:(?:images|pictures|photos|pics)\s+of\s+(?P<keyword_after>.+)|(?P<keyword_before>.+?)\s+(?:images|pictures|photos|pics))$',
+    re.IGNORECASE
+)
+
+# Words that make a weather request more than a plain "current weather in <city>"
+WEATHER_BAILOUT_WORDS = {"or", "tomorrow", "yesterday", "forecast", "week", "weekend", "next", "last",
+                         "morning", "afternoon", "evening", "night", "today", "tonight"}
+
+# A location starting with one of these ("my trip", "the morning") is not a city name
+LOCATION_BAILOUT_FIRST_WORDS = {"the", "a", "an", "my", "your", "our", "their", "his", "her", "its",
+                                "this", "that", "these", "those"}
+
+MAX_LOCATION_WORDS = 4
+MAX_WEATHER_LOCATIONS = 10
+MAX_IMAGE_COUNT = 100
+
+
+class FastRouter:
+    """
+    Deterministic pre-router for messages that need no model to classify.
+
+    Returns the same {"action": "use_tool", ...} dicts as analyze_message for
+    high-confidence matches and None otherwise, so the caller can fall
+    through to the LLM.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.fired = {"calculator": 0, "weather": 0, "images": 0}
+        self.fell_through = 0
+
+    def route(self, message):
+        """
+        Classify a message locally
+
+        Args:
+            message (str): Raw user message
+
+        Returns:
+            dict or None: Routing decision, or None when the LLM should decide
+        """
+        text = re.sub(r'\s+', ' ', message.strip()).rstrip('?!. ')
+
+        decision = self.match_calculator(text) or self.match_weather(text) or self.match_images(text)
+
+        with self.lock:
+            if decision is None:
+                self.fell_through += 1
+            else:
+                self.fired[decision["tool"]] += 1
+
+        return decision
+
+    @staticmethod
+    def match_calculator(text):
+        expression = MATH_PREFIX.sub('', text).rstrip('= ')
+        if not expression or not re.match(ALLOWED_PATTERN, expression):
+            return None
+        # Needs at least one digit and one operator, "2024" alone is not a calculation
+        if not re.search(r'\d', expression) or not MATH_OPERATOR.search(expression):
+            return None
+        if SLASH_DATE.search(expression):
+            return None
+        return {"action": "use_tool", "tool": "calculator", "params": {"expression": expression}}
+
+    @staticmethod
+    def match_weather(text):
+        match = WEATHER_PATTERN.match(text)
+        if not match:
+            return None
+
+        # "Tokyo, Paris and Rome" becomes a batch lookup; without "and" a comma is
+        # more likely "Melbourne, Australia"
+        location = match.group("location")
+        if re.search(r'\band\b', location, re.IGNORECASE):
+            locations = [part.strip() for part in re.split(r',|\band\b', location, flags=re.IGNORECASE)]
+        else:
+            locations = [location.strip()]
+        if not locations or len(locations) > MAX_WEATHER_LOCATIONS:
+            return None
+        for location in locations:
+            words = location.lower().split()
+            if not words or len(words) > MAX_LOCATION_WORDS or WEATHER_BAILOUT_WORDS & set(words):
+                return None
+            if words[0] in LOCATION_BAILOUT_FIRST_WORDS:
+                return None
+
+        if len(locations) == 1:
+            return {"action": "use_tool", "tool": "weather", "params": {"location": locations[0]}}
+        return {"action": "use_tool", "tool": "weather", "params": {"locations": locations}}
+
+    @staticmethod
+    def match_images(text):
+        match = IMAGES_PATTERN.match(text)
+        if not match:
+            return None
+
+        count = int(match.group("count"))
+        keyword = (match.group("keyword_after") or match.group("keyword_before")).strip()
+        if count == 0 or count > MAX_IMAGE_COUNT or not keyword:
+            return None
+        return {"action": "use_tool", "tool": "images", "params": {"keyword": keyword, "count": count}}
+
+    def stats(self):
+        """Return how often the fast path fired, per tool, and how often it fell through"""
+        with self.lock:
+            fired = sum(self.fired.values())
+            total = fired + self.fell_through
+            return {
+                "fired": fired,
+                "fired_by_tool": dict(self.fired),
+                "fell_through": self.fell_through,
+                "fire_rate": fired / total if total else 0.0
+            }
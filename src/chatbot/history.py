@@ -0,0 +1,111 @@
+from collections import deque
+
+# Rough characters-per-token ratio; close enough for budgeting without a tokenizer
+CHARS_PER_TOKEN = 4
+
+SUMMARY_SYSTEM_PROMPT = """You maintain a running summary of a conversation between a user and a chatbot that can use calculator, weather and image download tools.
+Merge the previous summary with the new messages into one short summary (at most a few sentences).
+Keep facts the user stated, their preferences, and tool results that may be referred to later. Reply with the summary only."""
+
+
+def estimate_tokens(text):
+    """
+    Estimate the token count of a piece of text
+
+    Args:
+        text (str): Message content
+
+    Returns:
+        int: Approximate number of tokens
+    """
+    return len(text or "") // CHARS_PER_TOKEN + 1
+
+
+class ConversationHistory:
+    """
+    Bounded conversation history with a token budget and a rolling summary.
+
+    Recent messages live in a ring buffer. Once the buffer exceeds `max_tokens`
+    (or `max_messages`), the oldest messages move to an overflow list that is
+    later folded into `summary`, either by a model (see compaction_messages /
+    apply_summary) or locally by compact_locally. Memory and prompt size stay
+    flat no matter how long the session runs.
+    """
+
+    def __init__(self, max_tokens=1500, max_messages=40, summary_max_tokens=300):
+        """
+        Args:
+            max_tokens (int): Token budget for the buffered messages plus the summary
+            max_messages (int): Hard cap on the number of buffered messages
+            summary_max_tokens (int): Token cap on the rolling summary
+        """
+        self.max_tokens = max_tokens
+        self.max_messages = max_messages
+        self.summary_max_tokens = summary_max_tokens
+        self.messages = deque()
+        self.message_tokens = 0
+        self.overflow = []
+        self.summary = ""
+
+    def append(self, message):
+        """Add a {"role", "content"} message, moving the oldest ones to overflow if over budget"""
+        message = {"role": message["role"], "content": str(message.get("content") or "")}
+        self.messages.append(message)
+        self.message_tokens += estimate_tokens(message["content"])
+
+        budget = self.max_tokens - estimate_tokens(self.summary)
+        while len(self.messages) > 1 and (self.message_tokens > budget or len(self.messages) > self.max_messages):
+            oldest = self.messages.popleft()
+            self.message_tokens -= estimate_tokens(oldest["content"])
+            self.overflow.append(oldest)
+
+    def needs_compaction(self):
+        return bool(self.overflow)
+
+    def compaction_messages(self):
+        """Build the prompt asking a model to fold the overflow into the summary"""
+        transcript = "\n".join(f"{message['role']}: {message['content']}" for message in self.overflow)
+        return [
+            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": f"Previous summary:\n{self.summary or '(none)'}\n\nNew messages:\n{transcript}"}
+        ]
+
+    def apply_summary(self, summary):
+        """Replace the rolling summary with a model-written one and drop the overflow"""
+        self.summary = self.truncate(summary.strip())
+        self.overflow = []
+
+    def compact_locally(self):
+        """Fold the overflow into the summary without a model call (keeps the most recent text)"""
+        transcript = " ".join(f"{message['role']}: {message['content']}" for message in self.overflow)
+        self.summary = self.truncate(f"{self.summary} {transcript}".strip(), keep_end=True)
+        self.overflow = []
+
+    def truncate(self, text, keep_end=False):
+        max_chars = self.summary_max_tokens * CHARS_PER_TOKEN
+        if len(text) <= max_chars:
+            return text
+        return "..." + text[-max_chars:] if keep_end else text[:max_chars] + "..."
+
+    def as_messages(self):
+        """Return the bounded history as chat messages, summary first"""
+        messages = []
+        if self.summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation: {self.summary}"})
+        messages.extend(self.messages)
+        return messages
+
+    def token_count(self):
+        return self.message_tokens + (estimate_tokens(self.summary) if self.summary else 0)
+
+    def clear(self):
+        self.messages.clear()
+        self.message_tokens = 0
+        self.overflow = []
+        self.summary = ""
+
+    def __len__(self):
+        return len(self.messages)
+
+    def __iter__(self):
+        return iter(self.messages)
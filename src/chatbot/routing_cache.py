@@ -0,0 +1,150 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Only tool routing decisions are cached; "chat" decisions carry a conversational
+# reply that would otherwise be repeated word for word
+CACHEABLE_ACTIONS = {"use_tool", "suggest_tool", "ask_clarification"}
+
+
+def normalize_message(message):
+    """
+    Normalize a user message for cache lookups
+
+    Args:
+        message (str): Raw user message
+
+    Returns:
+        str: Lowercased message with collapsed whitespace and no trailing punctuation
+    """
+    message = re.sub(r'\s+', ' ', message.strip().lower())
+    return message.rstrip('?!. ')
+
+
+class RoutingCache:
+    """
+    Cache for analyze_message routing decisions, keyed on normalized text and model id.
+
+    An in-memory LRU tier is always used; an optional SQLite tier keeps decisions
+    across restarts. Entries expire after `ttl` seconds in both tiers.
+    """
+
+    def __init__(self, max_entries=1024, ttl=3600, db_path=None, max_disk_entries=100000):
+        """
+        Args:
+            max_entries (int): Size of the in-memory LRU tier
+            ttl (float): Seconds a decision stays valid
+            db_path (str, optional): SQLite file for the on-disk tier, disabled when None
+            max_disk_entries (int): Size limit of the on-disk tier, oldest entries are pruned
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self.memory = OrderedDict()  # key -> (stored_at, decision_json)
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.db = None
+        if db_path:
+            self.db = sqlite3.connect(db_path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS routing_cache ("
+                "key TEXT PRIMARY KEY, decision TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self.db.commit()
+
+    @staticmethod
+    def make_key(model, message):
+        return f"{model}\n{normalize_message(message)}"
+
+    def get(self, model, message):
+        """Return a cached decision dict, or None on a miss"""
+        key = self.make_key(model, message)
+        now = time.time()
+
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                stored_at, decision = entry
+                if now - stored_at <= self.ttl:
+                    self.memory.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(decision)
+                del self.memory[key]
+
+            if self.db is not None:
+                row = self.db.execute(
+                    "SELECT decision, stored_at FROM routing_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    decision, stored_at = row
+                    if now - stored_at <= self.ttl:
+                        self._remember(key, stored_at, decision)
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return json.loads(decision)
+                    self.db.execute("DELETE FROM routing_cache WHERE key = ?", (key,))
+                    self.db.commit()
+
+            self.misses += 1
+            return None
+
+    def set(self, model, message, decision):
+        """Store a routing decision if it is cacheable"""
+        if not isinstance(decision, dict) or decision.get("action") not in CACHEABLE_ACTIONS:
+            return
+
+        key = self.make_key(model, message)
+        stored_at = time.time()
+        encoded = json.dumps(decision)
+
+        with self.lock:
+            self._remember(key, stored_at, encoded)
+
+            if self.db is not None:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO routing_cache (key, decision, stored_at) VALUES (?, ?, ?)",
+                    (key, encoded, stored_at)
+                )
+                self.db.execute(
+                    "DELETE FROM routing_cache WHERE key IN ("
+                    "SELECT key FROM routing_cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,)
+                )
+                self.db.commit()
+
+    def _remember(self, key, stored_at, encoded):
+        self.memory[key] = (stored_at, encoded)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+            if self.db is not None:
+                self.db.execute("DELETE FROM routing_cache")
+                self.db.commit()
+
+    def stats(self):
+        """Return hit/miss counters and tier sizes"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self.memory)
+            }
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
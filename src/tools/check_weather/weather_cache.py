@@ -0,0 +1,240 @@
+import asyncio
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+def normalize_location(location_name):
+    """
+    Normalize a location query for cache lookups
+
+    Args:
+        location_name (str): Location as typed, e.g. "  melbourne, AU "
+
+    Returns:
+        str: Lowercased query with collapsed whitespace
+    """
+    return re.sub(r'\s+', ' ', str(location_name).strip().lower()).strip(' ,.')
+
+
+class WeatherCache:
+    """
+    TTL cache for weather lookups with stale-while-revalidate and single-flight.
+
+    Entries are stored per resolved (location, country) pair, and each
+    normalized query is an alias of the pair it resolved to, so "Melbourne"
+    and "melbourne, australia" share one entry. Concurrent misses for the same
+    query share one upstream call. Results older than `ttl` but younger than
+    `ttl + stale_ttl` are served immediately while a refresh runs in the
+    background. Error results are never cached, and a ttl of 0 or less turns
+    caching off (concurrent lookups of a query are still shared).
+    """
+
+    def __init__(self, ttl=600, stale_ttl=1800, max_entries=512):
+        """
+        Args:
+            ttl (float): Seconds a result is considered fresh
+            stale_ttl (float): Extra seconds a stale result may be served while refreshing
+            max_entries (int): Maximum number of cached locations
+        """
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+
+        self.entries = OrderedDict()  # (location, country) -> (fetched_at, weather_info)
+        self.aliases = {}  # normalized query -> (location, country)
+        self.lock = threading.Lock()
+        self.inflight = {}  # normalized query -> concurrent.futures.Future
+        self.async_inflight = {}  # normalized query -> asyncio.Task
+        self.background_tasks = set()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def lookup(self, key):
+        """Return (weather_info, is_stale) for a query, or (None, False). Caller holds the lock."""
+        if not self.enabled:
+            return None, False
+        resolved = self.aliases.get(key)
+        entry = self.entries.get(resolved) if resolved else None
+        if entry is None:
+            return None, False
+
+        fetched_at, weather_info = entry
+        age = time.time() - fetched_at
+        if age <= self.ttl:
+            self.entries.move_to_end(resolved)
+            return dict(weather_info), False
+        if age <= self.ttl + self.stale_ttl:
+            return dict(weather_info), True
+
+        del self.entries[resolved]
+        return None, False
+
+    def store(self, key, weather_info):
+        """Cache a successful result under its resolved pair and alias the query to it"""
+        if 'error' in weather_info or not self.enabled:
+            return
+
+        resolved = (weather_info['location'].lower(), weather_info['country'].lower())
+        with self.lock:
+            self.entries[resolved] = (time.time(), dict(weather_info))
+            self.entries.move_to_end(resolved)
+            self.aliases[key] = resolved
+
+            while len(self.entries) > self.max_entries:
+                evicted, _ = self.entries.popitem(last=False)
+                self.aliases = {alias: pair for alias, pair in self.aliases.items() if pair != evicted}
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def put(self, location_name, weather_info):
+        """Cache a result fetched outside get/get_async (e.g. by a bulk request)"""
+        self.store(normalize_location(location_name), weather_info)
+
+    def get(self, location_name, fetch, cached_only=False):
+        """
+        Return weather info for a location, calling fetch(location_name) only when needed
+
+        Args:
+            location_name (str): Location as typed by the user
+            fetch (callable): Uncached lookup returning a weather info dict
+            cached_only (bool): Return None on a miss instead of fetching; stale
+                entries are still served and refreshed (used by batch lookups)
+
+        Returns:
+            dict: Weather info (or an error dict from fetch), None for a cached_only miss
+        """
+        key = normalize_location(location_name)
+
+        with self.lock:
+            weather_info, is_stale = self.lookup(key)
+            if weather_info is not None:
+                if is_stale:
+                    self.stale_hits += 1
+                    self.start_background_refresh(key, location_name, fetch)
+                else:
+                    self.hits += 1
+                return weather_info
+            if cached_only:
+                return None
+
+            future = self.inflight.get(key)
+            is_owner = future is None
+            if is_owner:
+                self.misses += 1
+                future = Future()
+                self.inflight[key] = future
+            else:
+                self.coalesced += 1
+
+        # Someone else is already fetching this location, share their result
+        if not is_owner:
+            return dict(future.result())
+
+        return self.run_fetch(key, location_name, fetch, future)
+
+    def run_fetch(self, key, location_name, fetch, future):
+        try:
+            weather_info = fetch(location_name)
+            self.store(key, weather_info)
+            future.set_result(weather_info)
+            return weather_info
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                self.inflight.pop(key, None)
+
+    def start_background_refresh(self, key, location_name, fetch):
+        """Refresh a stale entry in a daemon thread unless a refresh is already running. Caller holds the lock."""
+        if key in self.inflight:
+            return
+        future = Future()
+        self.inflight[key] = future
+
+        def refresh():
+            try:
+                self.run_fetch(key, location_name, fetch, future)
+            except Exception:
+                pass
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    async def get_async(self, location_name, fetch_async, cached_only=False):
+        """
+        Async counterpart of get, for use from an event loop
+
+        Args:
+            location_name (str): Location as typed by the user
+            fetch_async (callable): Coroutine function returning a weather info dict
+            cached_only (bool): Return None on a miss instead of fetching
+
+        Returns:
+            dict: Weather info (or an error dict from fetch_async), None for a cached_only miss
+        """
+        key = normalize_location(location_name)
+
+        with self.lock:
+            weather_info, is_stale = self.lookup(key)
+            if weather_info is not None:
+                if is_stale:
+                    self.stale_hits += 1
+                else:
+                    self.hits += 1
+
+            task = self.async_inflight.get(key)
+            if weather_info is None and not cached_only:
+                if task is not None:
+                    self.coalesced += 1
+                else:
+                    self.misses += 1
+
+        if weather_info is not None:
+            if is_stale and task is None:
+                refresh = self.start_async_fetch(key, location_name, fetch_async)
+                self.background_tasks.add(refresh)
+                refresh.add_done_callback(self.background_tasks.discard)
+            return weather_info
+        if cached_only:
+            return None
+
+        if task is None:
+            task = self.start_async_fetch(key, location_name, fetch_async)
+        return dict(await asyncio.shield(task))
+
+    def start_async_fetch(self, key, location_name, fetch_async):
+        async def fetch():
+            try:
+                weather_info = await fetch_async(location_name)
+                self.store(key, weather_info)
+                return weather_info
+            finally:
+                self.async_inflight.pop(key, None)
+
+        task = asyncio.ensure_future(fetch())
+        self.async_inflight[key] = task
+        return task
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.aliases.clear()
+
+    def stats(self):
+        """Return hit, stale hit, miss and coalesced request counters"""
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "entries": len(self.entries)
+            }
@@ -1,11 +1,66 @@
 import requests
+import httpx
 import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
 
+from src.transport.http_transport import get_transport, async_get, async_request
+from .weather_cache import WeatherCache, normalize_location
+
 load_dotenv()
 
+BASE_URL = "http://api.weatherapi.com/v1/current.json"
+
+# WeatherAPI.com bulk requests accept at most this many locations per call
+BULK_MAX_LOCATIONS = 50
+
+# The bulk endpoint needs a paid plan; set WEATHER_BULK=1 to use it
+use_bulk_default = os.getenv('WEATHER_BULK', '0') == '1'
+
+# Shared by the sync and async lookups; WEATHER_CACHE_TTL=0 disables caching
+weather_cache = WeatherCache(
+    ttl=float(os.getenv('WEATHER_CACHE_TTL', 600)),
+    stale_ttl=float(os.getenv('WEATHER_CACHE_STALE_TTL', 1800))
+)
+
+def parse_weather_data(data):
+    """
+    Build the weather info dict from a WeatherAPI.com current.json response body
+    
+    Args:
+        data (dict): Decoded JSON response
+        
+    Returns:
+        dict: Weather information including temperature, description, humidity, etc.
+    """
+    return {
+        'location': data['location']['name'],
+        'country': data['location']['country'],
+        'temperature': data['current']['temp_c'],
+        'feels_like': data['current']['feelslike_c'],
+        'description': data['current']['condition']['text'],
+        'humidity': data['current']['humidity'],
+        'wind_speed': data['current']['wind_kph'],
+        'visibility': data['current']['vis_km'],
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    }
+
 def get_weather_info(location_name):
+    """
+    Get current weather information for a given location, served from the
+    weather cache when possible (see WeatherCache for TTL and coalescing)
+    
+    Args:
+        location_name (str): Name of the city/location
+        
+    Returns:
+        dict: Weather information including temperature, description, humidity, etc.
+    """
+    return weather_cache.get(location_name, fetch_weather_info)
+
+def fetch_weather_info(location_name):
     """
     Get current weather information for a given location using WeatherAPI.com
     
@@ -16,7 +71,6 @@ def get_weather_info(location_name):
         dict: Weather information including temperature, description, humidity, etc.
     """
     API_KEY = os.getenv('WEATHER_API_KEY')  # Get your key from https://www.weatherapi.com/
-    BASE_URL = "http://api.weatherapi.com/v1/current.json"
     
     if not API_KEY:
         return {'error': "API key not found. Please set WEATHER_API_KEY in your .env file"}
@@ -28,24 +82,13 @@ def get_weather_info(location_name):
     }
     
     try:
-        response = requests.get(BASE_URL, params=params)
+        # Pooled keep-alive session with timeouts and retries
+        response = get_transport().get(BASE_URL, params=params)
         response.raise_for_status()
         
         data = response.json()
         
-        weather_info = {
-            'location': data['location']['name'],
-            'country': data['location']['country'],
-            'temperature': data['current']['temp_c'],
-            'feels_like': data['current']['feelslike_c'],
-            'description': data['current']['condition']['text'],
-            'humidity': data['current']['humidity'],
-            'wind_speed': data['current']['wind_kph'],
-            'visibility': data['current']['vis_km'],
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
-        
-        return weather_info
+        return parse_weather_data(data)
         
     except requests.exceptions.RequestException as e:
         return {'error': f"Network error: {str(e)}"}
@@ -54,6 +97,217 @@ def get_weather_info(location_name):
     except Exception as e:
         return {'error': f"Unexpected error: {str(e)}"}
 
+async def get_weather_info_async(location_name):
+    """
+    Async version of get_weather_info, for use from an asyncio event loop
+    
+    Args:
+        location_name (str): Name of the city/location
+        
+    Returns:
+        dict: Same shape as get_weather_info, including the 'error' key on failure
+    """
+    return await weather_cache.get_async(location_name, fetch_weather_info_async)
+
+async def fetch_weather_info_async(location_name, client=None):
+    """
+    Uncached async lookup against WeatherAPI.com
+    
+    Args:
+        location_name (str): Name of the city/location
+        client (httpx.AsyncClient, optional): Client to use instead of the shared pooled one
+        
+    Returns:
+        dict: Same shape as get_weather_info, including the 'error' key on failure
+    """
+    API_KEY = os.getenv('WEATHER_API_KEY')
+    
+    if not API_KEY:
+        return {'error': "API key not found. Please set WEATHER_API_KEY in your .env file"}
+    
+    params = {
+        'key': API_KEY,
+        'q': location_name,
+        'aqi': 'no'
+    }
+    
+    try:
+        response = await async_get(BASE_URL, client=client, params=params)
+        response.raise_for_status()
+        
+        return parse_weather_data(response.json())
+        
+    except httpx.HTTPError as e:
+        return {'error': f"Network error: {str(e)}"}
+    except KeyError as e:
+        return {'error': f"Data parsing error: {str(e)}"}
+    except Exception as e:
+        return {'error': f"Unexpected error: {str(e)}"}
+
+def unique_locations(locations):
+    """Strip and de-duplicate location names, keeping their order and the first spelling of each"""
+    # Same key as the weather cache, so "Tokyo" and "tokyo " are one lookup
+    unique = {}
+    for location in locations:
+        location = str(location).strip()
+        if location:
+            unique.setdefault(normalize_location(location), location)
+    return list(unique.values())
+
+def parse_bulk_response(data, chunk):
+    """
+    Map a WeatherAPI.com bulk response back to the requested locations
+    
+    Args:
+        data (dict): Decoded bulk JSON response
+        chunk (list): Location names sent in the request, custom_id is their index
+        
+    Returns:
+        dict: location name -> weather info or error dict
+    """
+    results = {}
+    for item in data.get('bulk', []):
+        query = item.get('query', {})
+        try:
+            location_name = chunk[int(query.get('custom_id'))]
+        except (TypeError, ValueError, IndexError):
+            continue
+        
+        if 'error' in query:
+            results[location_name] = {'error': query['error'].get('message', 'Unknown error')}
+        else:
+            try:
+                results[location_name] = parse_weather_data(query)
+            except KeyError as e:
+                results[location_name] = {'error': f"Data parsing error: {str(e)}"}
+    
+    for location_name in chunk:
+        results.setdefault(location_name, {'error': "Missing from bulk response"})
+    return results
+
+def bulk_request_body(chunk):
+    return {'locations': [{'q': location_name, 'custom_id': str(index)} for index, location_name in enumerate(chunk)]}
+
+def fetch_weather_bulk(locations):
+    """
+    Fetch many locations with WeatherAPI.com bulk requests (paid plans only)
+    
+    Args:
+        locations (list): Location names
+        
+    Returns:
+        dict: location name -> weather info or error dict
+    """
+    API_KEY = os.getenv('WEATHER_API_KEY')
+    if not API_KEY:
+        return {location_name: {'error': "API key not found. Please set WEATHER_API_KEY in your .env file"}
+                for location_name in locations}
+    
+    results = {}
+    for start in range(0, len(locations), BULK_MAX_LOCATIONS):
+        chunk = locations[start:start + BULK_MAX_LOCATIONS]
+        response = get_transport().request('POST', BASE_URL, params={'key': API_KEY, 'q': 'bulk'},
+                                           json=bulk_request_body(chunk))
+        response.raise_for_status()
+        results.update(parse_bulk_response(response.json(), chunk))
+    return results
+
+def get_weather_batch(locations, max_workers=8, use_bulk=None):
+    """
+    Get current weather for many locations at once
+    
+    Cached locations are answered immediately. The rest are fetched with the
+    bulk endpoint when enabled, otherwise (or if the bulk call fails) with
+    up to max_workers concurrent single lookups.
+    
+    Args:
+        locations (list): Location names
+        max_workers (int): Maximum concurrent single lookups
+        use_bulk (bool, optional): Use the bulk endpoint, defaults to WEATHER_BULK
+        
+    Returns:
+        dict: location name -> weather info or error dict, in input order
+    """
+    locations = unique_locations(locations)
+    use_bulk = use_bulk_default if use_bulk is None else use_bulk
+    
+    # Cached locations are answered like single lookups: stale ones are served and refreshed
+    results = {location_name: weather_cache.get(location_name, fetch_weather_info, cached_only=True)
+               for location_name in locations}
+    missing = [location_name for location_name, info in results.items() if info is None]
+    
+    if missing and use_bulk and len(missing) > 1:
+        try:
+            for location_name, info in fetch_weather_bulk(missing).items():
+                weather_cache.put(location_name, info)
+                results[location_name] = info
+            missing = []
+        except Exception:
+            pass  # Fall back to single lookups below
+    
+    if missing:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(missing)))) as executor:
+            for location_name, info in zip(missing, executor.map(get_weather_info, missing)):
+                results[location_name] = info
+    
+    return results
+
+async def fetch_weather_bulk_async(locations):
+    """Async version of fetch_weather_bulk"""
+    API_KEY = os.getenv('WEATHER_API_KEY')
+    if not API_KEY:
+        return {location_name: {'error': "API key not found. Please set WEATHER_API_KEY in your .env file"}
+                for location_name in locations}
+    
+    results = {}
+    for start in range(0, len(locations), BULK_MAX_LOCATIONS):
+        chunk = locations[start:start + BULK_MAX_LOCATIONS]
+        response = await async_request('POST', BASE_URL, params={'key': API_KEY, 'q': 'bulk'},
+                                       json=bulk_request_body(chunk))
+        response.raise_for_status()
+        results.update(parse_bulk_response(response.json(), chunk))
+    return results
+
+async def get_weather_batch_async(locations, max_concurrency=8, use_bulk=None):
+    """
+    Async version of get_weather_batch, bounding concurrency with a semaphore
+    
+    Args:
+        locations (list): Location names
+        max_concurrency (int): Maximum concurrent single lookups
+        use_bulk (bool, optional): Use the bulk endpoint, defaults to WEATHER_BULK
+        
+    Returns:
+        dict: location name -> weather info or error dict, in input order
+    """
+    locations = unique_locations(locations)
+    use_bulk = use_bulk_default if use_bulk is None else use_bulk
+    
+    results = {location_name: await weather_cache.get_async(location_name, fetch_weather_info_async, cached_only=True)
+               for location_name in locations}
+    missing = [location_name for location_name, info in results.items() if info is None]
+    
+    if missing and use_bulk and len(missing) > 1:
+        try:
+            for location_name, info in (await fetch_weather_bulk_async(missing)).items():
+                weather_cache.put(location_name, info)
+                results[location_name] = info
+            missing = []
+        except Exception:
+            pass
+    
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    
+    async def fetch_one(location_name):
+        async with semaphore:
+            return await get_weather_info_async(location_name)
+    
+    if missing:
+        for location_name, info in zip(missing, await asyncio.gather(*(fetch_one(name) for name in missing))):
+            results[location_name] = info
+    
+    return results
+
 # Test the function
 if __name__ == "__main__":
     print("Testing WeatherAPI.com...")
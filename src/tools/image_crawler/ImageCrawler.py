@@ -14,14 +14,42 @@ Copyright 2018 YoongiKim
    limitations under the License.
 """
 
+import io
 import os
-import requests
-import shutil
-from .collect_links import CollectLinks
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urlsplit
+from .browser_pool import BrowserPool
+from .image_store import ImageStore, url_key
+from .search_backends import SeleniumSearchBackend, check_full_resolution, iter_with_fallback
+from src.transport.http_transport import get_transport
 from PIL import Image
 import base64
-from pathlib import Path
-import random
+
+
+# Leading bytes of the image formats kept by the crawler
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+    (b'BM', 'bmp'),
+)
+
+# Bytes needed to recognise every signature above, including RIFF....WEBP
+SNIFF_BYTES = 12
+
+# Returned by fetch_image when the bytes arrived but are not a usable image. Only
+# these links are recorded as unreadable; None (HTTP errors, rate limits, oversized
+# or cut-off downloads) may succeed on a later crawl
+UNREADABLE = object()
+
+
+def normalize_keyword(keyword):
+    """Folder and manifest name for a keyword, so "Cats", " cats " and "cats" share one crawl"""
+    return ' '.join(str(keyword).replace('"', '').split()).lower()
 
 
 class Sites:
@@ -41,9 +69,119 @@ class Sites:
             return "&tbs=itp:face"
 
 
+class LinkFeed:
+    """
+    Runs a link collector in its own thread and hands links to the download
+    stage through a bounded queue, so downloads start while the browser is
+    still searching. A full queue pauses the collector; the time each stage
+    spends waiting on the other is kept as a backpressure measure.
+    """
+
+    def __init__(self, links, maxsize=32):
+        """
+        :param links: Iterable of links, usually a search backend generator
+        :param maxsize: Links buffered between the stages before the collector waits
+        """
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.stop_event = threading.Event()
+        self.done = threading.Event()
+        self.produced = 0
+        self.collector_wait = 0.0  # Seconds the collector waited for the downloaders
+        self.download_wait = 0.0  # Seconds the downloaders waited for the collector
+        self.thread = threading.Thread(target=self.run, args=(links,), daemon=True)
+        self.thread.start()
+
+    def run(self, links):
+        try:
+            for link in links:
+                start = time.monotonic()
+                while not self.stop_event.is_set():
+                    try:
+                        self.queue.put(link, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                self.collector_wait += time.monotonic() - start
+                if self.stop_event.is_set():
+                    break
+                self.produced += 1
+        except Exception as e:
+            print('Link collection failed - {}'.format(e))
+        finally:
+            # Stops a generator's browser work right away instead of at garbage collection
+            if hasattr(links, 'close'):
+                links.close()
+            self.done.set()
+
+    def get(self, timeout=0):
+        """Return the next link, or None if none arrived within timeout"""
+        start = time.monotonic()
+        try:
+            if timeout:
+                return self.queue.get(timeout=timeout)
+            return self.queue.get_nowait()
+        except queue.Empty:
+            return None
+        finally:
+            self.download_wait += time.monotonic() - start
+
+    @property
+    def exhausted(self):
+        return self.done.is_set() and self.queue.empty()
+
+    def close(self, timeout=0.5):
+        """
+        Stop the collector without blocking the caller.
+
+        The collector only sees the stop event between links, and the next one may
+        be a page fetch or a slow click-through away. So the queue is drained to
+        free a collector blocked on it, and after a short join the daemon thread
+        is left to close its generator (and return its browser lease) on its own.
+
+        :param timeout: Seconds to wait for a collector that stops promptly
+        """
+        self.stop_event.set()
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+        self.thread.join(timeout)
+
+    def stats(self):
+        return {
+            'produced': self.produced,
+            'buffered': self.queue.qsize(),
+            'collector_wait': round(self.collector_wait, 2),
+            'download_wait': round(self.download_wait, 2)
+        }
+
+
+class KeywordFlight:
+    """
+    One in-progress crawl of a keyword, shared by every caller asking for it.
+
+    Callers that join raise target if they want more images, and their progress
+    callbacks receive the crawl's events too.
+    """
+
+    def __init__(self, target):
+        self.target = target
+        self.listeners = []
+        self.done = threading.Event()
+        self.ok = False
+        self.joined = 0
+
+    def progress(self, event, **data):
+        for listener in list(self.listeners):
+            listener(event, **data)
+
+
 class AutoCrawler:
     def __init__(self, skip_already_exist=True, download_path='download', full_resolution=False, 
-                 face=False, no_gui=False, proxy_list=None):
+                 face=False, no_gui=False, proxy_list=None, browser_pool=None, download_workers=8,
+                 download_host_limit=4, image_store=None, max_image_bytes=20 * 1024 * 1024,
+                 search_backends=None, derivatives=None):
         """
         :param skip_already_exist: Skips keyword already downloaded before.
         :param download_path: Download folder path
@@ -51,6 +189,13 @@ class AutoCrawler:
         :param face: Face search mode
         :param no_gui: No GUI mode. Acceleration for full_resolution mode.
         :param proxy_list: The proxy list. Every thread will randomly choose one from the list.
+        :param browser_pool: BrowserPool to lease browsers from. A private single-browser pool is used if omitted.
+        :param download_workers: Images downloaded in parallel
+        :param download_host_limit: Maximum parallel downloads from one host
+        :param image_store: ImageStore to save into. Defaults to one under download_path/.store
+        :param max_image_bytes: Downloads larger than this are abandoned (None for no limit)
+        :param search_backends: SearchBackends tried in order for links. Defaults to the browser only
+        :param derivatives: Optional DerivativeGenerator run on each keyword after it is downloaded
         """
         self.skip = skip_already_exist
         self.download_path = download_path
@@ -58,30 +203,48 @@ class AutoCrawler:
         self.face = face
         self.no_gui = no_gui
         self.proxy_list = proxy_list if proxy_list and len(proxy_list) > 0 else None
+        # Browsers are kept open between keywords instead of launching Chrome per request
+        self.owns_browser_pool = browser_pool is None
+        self.browser_pool = browser_pool or BrowserPool(size=1, no_gui=no_gui, proxy_list=self.proxy_list)
+        self.search_backends = search_backends or [SeleniumSearchBackend(self.browser_pool)]
+        if full_resolution:
+            check_full_resolution(self.search_backends)
+        self.derivatives = derivatives
+        self.download_workers = download_workers
+        self.download_host_limit = download_host_limit
+        self.max_image_bytes = max_image_bytes
+        self.host_slots = {}
+        self.host_slots_lock = threading.Lock()
+        # Keyword -> KeywordFlight, so concurrent requests for a keyword share one crawl
+        self.flights = {}
+        self.flights_lock = threading.Lock()
+        self.flights_joined = 0
 
         os.makedirs('./{}'.format(self.download_path), exist_ok=True)
+        self.owns_image_store = image_store is None
+        self.image_store = image_store or ImageStore(os.path.join(self.download_path, '.store'))
 
     @staticmethod
-    def get_extension_from_link(link, default='jpg'):
-        splits = str(link).split('.')
-        if len(splits) == 0:
-            return default
-        ext = splits[-1].lower()
-        if ext == 'jpg' or ext == 'jpeg':
-            return 'jpg'
-        elif ext == 'gif':
-            return 'gif'
-        elif ext == 'png':
-            return 'png'
-        else:
-            return default
+    def sniff_image_type(head):
+        """
+        Guess the image type from the first bytes of a download.
+
+        :return: Extension, or None if the bytes do not start like an image we keep
+        """
+        for signature, ext in IMAGE_SIGNATURES:
+            if head.startswith(signature):
+                return ext
+        if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+            return 'webp'
+        return None
 
     @staticmethod
-    def validate_image(path):   
+    def validate_image_bytes(data):
         try:
-            with Image.open(path) as img:
-                # Get the format and convert to lowercase
+            with Image.open(io.BytesIO(data)) as img:
                 ext = img.format.lower()
+                # Checks the whole file, catching truncated downloads
+                img.verify()
                 if ext == 'jpeg':
                     ext = 'jpg'
                 return ext
@@ -95,149 +258,322 @@ class AutoCrawler:
         if not os.path.exists(path):
             os.makedirs(path)
 
-    @staticmethod
-    def save_object_to_file(obj, file_path, is_base64=False):
-        try:
-            with open('{}'.format(file_path), 'wb') as file:
-                if is_base64:
-                    file.write(obj)
-                else:
-                    shutil.copyfileobj(obj.raw, file)
-        except Exception as e:
-            print('Save failed - {}'.format(e))
-
     @staticmethod
     def base64_to_object(src):
         header, encoded = str(src).split(',', 1)
         data = base64.decodebytes(bytes(encoded, encoding='utf-8'))
         return data
 
-    def download_images(self, keyword, links, site_name, max_count=0):
-        self.make_dir('{}/{}'.format(self.download_path, keyword.replace('"', '')))
+    def host_slot(self, link):
+        host = urlsplit(link).netloc
+        with self.host_slots_lock:
+            if host not in self.host_slots:
+                self.host_slots[host] = threading.BoundedSemaphore(self.download_host_limit)
+            return self.host_slots[host]
+
+    @staticmethod
+    def ignore_progress(event, **data):
+        pass
+
+    def fetch_image(self, link, progress=None):
+        """
+        Download one link into memory and validate it before anything is written.
+
+        The body is streamed: a download is abandoned as soon as its first bytes
+        are not an image signature or it grows past max_image_bytes, so error
+        pages and huge files are not read to the end.
+
+        :param link: Image URL or data URI
+        :param progress: Callback (event, **data) told when the image is 'downloaded' and 'validated'
+        :return: (data, ext) for a readable image, UNREADABLE if the bytes are not an image,
+                 None if the download failed
+        """
+        progress = progress or self.ignore_progress
+        if str(link).startswith('data:image/jpeg;base64') or str(link).startswith('data:image/png;base64'):
+            data = self.base64_to_object(link)
+            if self.max_image_bytes and len(data) > self.max_image_bytes:
+                print('Too large ({} bytes) - {}'.format(len(data), str(link)[:100]))
+                return None
+        else:
+            with self.host_slot(link):
+                data = self.read_image_stream(link)
+            if data is None or data is UNREADABLE:
+                return data
+        progress('downloaded', link=link, size=len(data))
+
+        if self.sniff_image_type(data[:SNIFF_BYTES]) is None:
+            print('Unreadable file - {}'.format(str(link)[:100]))
+            return UNREADABLE
+
+        ext = self.validate_image_bytes(data)
+        if ext is None:
+            print('Unreadable file - {}'.format(str(link)[:100]))
+            return UNREADABLE
+        progress('validated', link=link, ext=ext)
+        return data, ext
+
+    def read_image_stream(self, link):
+        """
+        Read a response body chunk by chunk, giving up once it cannot be a usable image
+
+        :return: Body bytes, UNREADABLE if they do not start like an image, None if the download failed
+        """
+        # No retries: a slow or failing host would hold a worker and its host slot
+        # through every backoff, while other candidate links are waiting
+        response = get_transport().get(link, stream=True, timeout=10, max_retries=0)
+        try:
+            if response.status_code != 200:
+                print('Download failed - HTTP {} for {}'.format(response.status_code, str(link)[:100]))
+                return None
+
+            length = response.headers.get('Content-Length', '')
+            if self.max_image_bytes and length.isdigit() and int(length) > self.max_image_bytes:
+                print('Too large ({} bytes) - {}'.format(length, str(link)[:100]))
+                return None
+
+            body = bytearray()
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                body += chunk
+                if len(body) >= SNIFF_BYTES and len(body) - len(chunk) < SNIFF_BYTES:
+                    if self.sniff_image_type(bytes(body[:SNIFF_BYTES])) is None:
+                        print('Not an image - {}'.format(str(link)[:100]))
+                        return UNREADABLE
+                if self.max_image_bytes and len(body) > self.max_image_bytes:
+                    print('Too large (over {} bytes) - {}'.format(self.max_image_bytes, str(link)[:100]))
+                    return None
+            return bytes(body)
+        finally:
+            response.close()
+
+    def download_images(self, keyword, links, site_name, max_count=0, progress=None):
+        """
+        Download links in parallel and add the first max_count new readable images to the keyword.
+
+        links may be a list or a generator still collecting links; generators run
+        in a LinkFeed thread so downloading overlaps with collection. At most
+        download_workers downloads are in flight at once, so no more links are
+        started once enough images are saved. Links already in the keyword are
+        skipped, and links fetched before for another keyword are reused from
+        the image store without downloading.
+
+        :param progress: Callback (event, **data) for 'link_found', 'downloaded', 'validated',
+                         'rejected' and 'saved' events. Download events come from worker threads
+        :return: Number of images added
+        """
+        progress = progress or self.ignore_progress
+        keyword = keyword.replace('"', '')
+        keyword_dir = '{}/{}'.format(self.download_path.replace('"', ''), keyword)
+        self.make_dir(keyword_dir)
         success_count = 0
 
         if max_count == 0:
-            max_count = len(links)
+            max_count = len(links) if hasattr(links, '__len__') else float('inf')
 
-        for index, link in enumerate(links):
-            if success_count >= max_count:
-                break
+        known_urls = self.image_store.keyword_urls(keyword)
+        pending = {}
+        feed = LinkFeed(links)
+        executor = ThreadPoolExecutor(max_workers=self.download_workers, thread_name_prefix='image-download')
 
-            try:
-                print('Downloading {} from {}: {} / {}'.format(keyword, site_name, success_count + 1, max_count))
+        try:
+            while success_count < max_count:
+                # Keep the window full, but never start more downloads than images still needed
+                while len(pending) < min(self.download_workers, max_count - success_count):
+                    # Only block for links when there is nothing else to wait for
+                    link = feed.get(timeout=0 if pending else 0.1)
+                    if link is None:
+                        break
+                    progress('link_found', link=link)
+                    if url_key(link) in known_urls:
+                        continue
 
-                if str(link).startswith('data:image/jpeg;base64'):
-                    response = self.base64_to_object(link)
-                    ext = 'jpg'
-                    is_base64 = True
-                elif str(link).startswith('data:image/png;base64'):
-                    response = self.base64_to_object(link)
-                    ext = 'png'
-                    is_base64 = True
-                else:
-                    response = requests.get(link, stream=True, timeout=10)
-                    ext = self.get_extension_from_link(link)
-                    is_base64 = False
-
-                no_ext_path = '{}/{}/{}_{}'.format(self.download_path.replace('"', ''), keyword, keyword, str(index).zfill(4))
-                path = no_ext_path + '.' + ext
-                self.save_object_to_file(response, path, is_base64=is_base64)
-
-                success_count += 1
-                del response
-
-                ext2 = self.validate_image(path)
-                if ext2 is None:
-                    print('Unreadable file - {}'.format(link))
-                    os.remove(path)
-                    success_count -= 1
-                else:
-                    if ext != ext2:
-                        path2 = no_ext_path + '.' + ext2
-                        os.rename(path, path2)
-                        print('Renamed extension {} -> {}'.format(ext, ext2))
-
-            except KeyboardInterrupt:
-                break
-            except Exception as e:
-                print('Download failed - ', e)
-                continue
+                    stored = self.image_store.lookup_url(link)
+                    if stored is None:
+                        pending[executor.submit(self.fetch_image, link, progress)] = link
+                    elif stored[0]:
+                        path = self.image_store.add_to_keyword(keyword, keyword_dir, stored[0], stored[1], link)
+                        if path:
+                            success_count += 1
+                            print('Reused {} from store: {} / {}'.format(keyword, success_count, max_count))
+                            progress('saved', link=link, path=path, count=success_count, reused=True)
+
+                if not pending:
+                    if feed.exhausted:
+                        break
+                    continue
+
+                # Wake up periodically to pick up newly collected links
+                done, _ = wait(pending, timeout=None if feed.exhausted else 0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    link = pending.pop(future)
+                    if success_count >= max_count:
+                        continue
+
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print('Download failed - ', e)
+                        progress('rejected', link=link)
+                        continue
+                    if result is None or result is UNREADABLE:
+                        if result is UNREADABLE:
+                            self.image_store.mark_unreadable(link)
+                        progress('rejected', link=link)
+                        continue
+
+                    data, ext = result
+                    try:
+                        digest = self.image_store.put(data, ext, link)
+                        path = self.image_store.add_to_keyword(keyword, keyword_dir, digest, ext, link)
+                    except Exception as e:
+                        print('Save failed - {}'.format(e))
+                        continue
+                    if path is None:
+                        continue  # Same image as one the keyword already has, under another URL
+
+                    success_count += 1
+                    print('Downloaded {} from {}: {} / {}'.format(keyword, site_name, success_count, max_count))
+                    progress('saved', link=link, path=path, count=success_count, reused=False)
+
+        except KeyboardInterrupt:
+            pass
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            feed.close()
+
+        print('Link pipeline for {}: {}'.format(keyword, feed.stats()))
+        return success_count
 
-    def download_keyword_images(self, keyword, num_images):
+    def download_keyword_images(self, keyword, num_images, progress=None):
         """
         Download images for a specific keyword with specified count.
+
+        Concurrent calls for the same keyword (after normalize_keyword) share one
+        crawl. A caller asking for more images than the running crawl raises its
+        target, and the crawl continues from the images it already has instead
+        of starting over.
         
         :param keyword: Search term (string)
         :param num_images: Number of images to download (integer)
+        :param progress: Optional callback (event, **data) for per-image progress, see download_images
         :return: Success status (boolean)
         """
-        print(f'Starting download for keyword: "{keyword}" with {num_images} images')
-        
-        # Create directory for the keyword
-        keyword_safe = keyword.replace('"', '')
-        keyword_dir = f'{self.download_path}/{keyword_safe}'
-        self.make_dir(keyword_dir)
-        
-        # Check if already completed and skip option is enabled
-        google_done_file = os.path.join(os.getcwd(), keyword_dir, 'google_done')
-        if os.path.exists(google_done_file) and self.skip:
-            print(f'Skipping already completed keyword: {keyword}')
-            return True
-        
-        # Determine site code based on full_resolution setting
-        site_code = Sites.GOOGLE_FULL if self.full_resolution else Sites.GOOGLE
-        site_name = Sites.get_text(site_code)
-        add_url = Sites.get_face_url(site_code) if self.face else ""
-        
+        keyword = normalize_keyword(keyword)
+
+        with self.flights_lock:
+            flight = self.flights.get(keyword)
+            leader = flight is None
+            if leader:
+                flight = self.flights[keyword] = KeywordFlight(num_images)
+            else:
+                flight.target = max(flight.target, num_images)
+                flight.joined += 1
+                self.flights_joined += 1
+            if progress:
+                flight.listeners.append(progress)
+
+        if not leader:
+            print(f'Joining the running download for "{keyword}"')
+            flight.done.wait()
+            if progress:
+                flight.listeners.remove(progress)
+            return flight.ok
+
         try:
-            # Initialize Chrome driver with proxy if available
-            proxy = None
-            if self.proxy_list:
-                proxy = random.choice(self.proxy_list)
+            resume = self.skip
+            while True:
+                target = flight.target
+                flight.ok = self.crawl_keyword(keyword, target, flight.progress, resume)
+                with self.flights_lock:
+                    # Stop unless someone joined with a larger count while this round ran
+                    if not flight.ok or flight.target <= target:
+                        del self.flights[keyword]
+                        break
+                print(f'Extending "{keyword}" from {target} to {flight.target} images')
+                resume = True  # Keep this crawl's images even when skip_already_exist is off
+
+            if flight.ok and self.derivatives is not None:
+                self.make_derivatives(keyword, flight.progress)
+        except BaseException:
+            with self.flights_lock:
+                self.flights.pop(keyword, None)
+            raise
+        finally:
+            if progress:
+                flight.listeners.remove(progress)
+            flight.done.set()
+        return flight.ok
+
+    def crawl_keyword(self, keyword, num_images, progress=None, resume=True):
+        """
+        Collect and download a normalized keyword's images while holding its folder lock,
+        so another process sharing download_path cannot write the same keyword meanwhile.
+
+        :param resume: Count images already in the keyword's manifest toward num_images
+        """
+        with self.image_store.lock_keyword(keyword):
+            print(f'Starting download for keyword: "{keyword}" with {num_images} images')
             
-            collect = CollectLinks(no_gui=self.no_gui, proxy=proxy)
+            # Create directory for the keyword
+            self.make_dir(f'{self.download_path}/{keyword}')
             
-        except Exception as e:
-            print(f'Error occurred while initializing chromedriver - {e}')
-            return False
-        
-        try:
-            print(f'Collecting links for "{keyword}" from {site_name}')
+            # Images already in the keyword's manifest count toward num_images, so a
+            # finished keyword is skipped and an interrupted or smaller one resumes
+            existing = self.image_store.keyword_count(keyword) if resume else 0
+            if existing >= num_images:
+                print(f'Skipping already completed keyword: {keyword}')
+                return True
+            needed = num_images - existing
+            if existing:
+                print(f'Resuming "{keyword}": {existing} images already downloaded')
+            if progress:
+                progress('started', existing=existing, needed=needed)
             
-            # Collect links based on site code
-            if site_code == Sites.GOOGLE:
-                links = collect.google(keyword, add_url)
-            elif site_code == Sites.GOOGLE_FULL:
-                links = collect.google_full(keyword, add_url, num_images)
-            else:
-                print('Invalid Site Code')
-                return False
+            # Determine site code based on full_resolution setting
+            site_code = Sites.GOOGLE_FULL if self.full_resolution else Sites.GOOGLE
+            site_name = Sites.get_text(site_code)
+            add_url = Sites.get_face_url(site_code) if self.face else ""
             
-            if not links:
-                print(f'No links collected for keyword: {keyword}')
-                return False
+            try:
+                print(f'Collecting links for "{keyword}" from {site_name}')
             
-            print(f'Collected {len(links)} links. Downloading images...')
+                # Links are downloaded as they are found, with spare candidates since some
+                # fail to download, fail to validate or are already in the keyword. With
+                # several backends, later ones only start if earlier ones cannot supply enough.
+                links = iter_with_fallback(self.search_backends, keyword, add_url, limit=(existing + needed) * 2,
+                                           full_resolution=site_code == Sites.GOOGLE_FULL)
             
-            # Download images with the specified limit
-            self.download_images(keyword, links, site_name, max_count=num_images)
+                saved = self.download_images(keyword, links, site_name, max_count=needed, progress=progress)
             
-            # Create completion marker file
-            Path(f'{keyword_dir}/google_done').touch()
+                if saved + existing == 0:
+                    print(f'No images downloaded for keyword: {keyword}')
+                    return False
             
-            print(f'Successfully completed download for "{keyword}": {num_images} images')
-            return True
+                print(f'Successfully completed download for "{keyword}": {saved + existing} images')
+                return True
             
+            except Exception as e:
+                print(f'Exception occurred during download for "{keyword}": {e}')
+                return False
+
+    def make_derivatives(self, keyword, progress=None):
+        """Render the keyword's previews in the derivative worker processes (this thread only waits)"""
+        keyword_dir = f'{self.download_path}/{keyword}'
+        try:
+            with self.image_store.lock_keyword(keyword):
+                manifest = self.derivatives.generate(self.image_store, keyword, keyword_dir)
         except Exception as e:
-            print(f'Exception occurred during download for "{keyword}": {e}')
-            return False
-        
-        finally:
-            # Ensure browser is closed
-            try:
-                collect.browser.quit()
-            except:
-                pass
+            print(f'Derivatives failed for "{keyword}": {e}')
+            return
+        print(f'Derivatives for "{keyword}": {len(manifest)} images')
+        if progress:
+            progress('derivatives', count=len(manifest), manifest=os.path.join(keyword_dir, 'derivatives.json'))
+
+    def close(self):
+        """Quit the browsers and close the store index, if this crawler created them itself"""
+        if self.owns_browser_pool:
+            self.browser_pool.close()
+        if self.owns_image_store:
+            self.image_store.close()
 
 
 if __name__ == '__main__':
@@ -307,5 +643,7 @@ if __name__ == '__main__':
     else:
         print(f"\n⚠️  {len(results) - success_count} test(s) failed")
     
+    crawler.close()
+
     print("\nCheck the 'test_downloads' folder to see downloaded images.")
     print("Each keyword will have its own subfolder.")
\ No newline at end of file
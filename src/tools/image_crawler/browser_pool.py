@@ -0,0 +1,186 @@
+import random
+import threading
+from contextlib import contextmanager
+
+
+class BrowserPool:
+    """
+    Long-lived pool of headless Chrome instances for CollectLinks.
+
+    Browsers are launched lazily (or up front with warm()), leased one per
+    keyword, health-checked before every lease and recycled after max_uses
+    searches, so Chrome's multi-second cold start is paid once per browser
+    instead of once per request.
+    """
+
+    def __init__(self, size=2, max_uses=50, no_gui=True, proxy_list=None, lease_timeout=120):
+        """
+        :param size: Maximum number of browsers alive at once
+        :param max_uses: Searches after which a browser is quit and replaced
+        :param no_gui: Run the browsers headless
+        :param proxy_list: Proxies to pick from at random for each new browser
+        :param lease_timeout: Seconds to wait for a free browser before giving up
+        """
+        self.size = size
+        self.max_uses = max_uses
+        self.no_gui = no_gui
+        self.proxy_list = proxy_list if proxy_list else None
+        self.lease_timeout = lease_timeout
+
+        self.idle = []
+        self.uses = {}  # CollectLinks -> searches done
+        self.alive = 0  # Idle + leased + being launched
+        self.condition = threading.Condition()
+        self.closed = False
+
+        self.launched = 0
+        self.recycled = 0
+        self.unhealthy = 0
+        self.leases = 0
+
+    def launch(self):
+        # Selenium is imported with the first browser, not when the pool is created
+        from .collect_links import CollectLinks
+
+        proxy = random.choice(self.proxy_list) if self.proxy_list else None
+        collect = CollectLinks(no_gui=self.no_gui, proxy=proxy, keep_open=True)
+        with self.condition:
+            self.uses[collect] = 0
+            self.launched += 1
+        return collect
+
+    @staticmethod
+    def quit(collect):
+        try:
+            collect.browser.quit()
+        except Exception:
+            pass
+
+    def discard(self, collect):
+        """Quit a browser and free its slot. Caller must not hold the lock."""
+        self.quit(collect)
+        with self.condition:
+            self.uses.pop(collect, None)
+            self.alive -= 1
+            self.condition.notify()
+
+    def acquire(self):
+        """
+        Lease a healthy browser, launching one if the pool is not full
+
+        :return: CollectLinks bound to the leased browser
+        :raises TimeoutError: When no browser frees up within lease_timeout
+        """
+        while True:
+            with self.condition:
+                ready = self.condition.wait_for(
+                    lambda: self.closed or self.idle or self.alive < self.size, self.lease_timeout)
+                if self.closed:
+                    raise RuntimeError('Browser pool is closed')
+                if not ready:
+                    raise TimeoutError('No browser available')
+                if self.idle:
+                    collect = self.idle.pop()
+                else:
+                    collect = None
+                    self.alive += 1
+
+            if collect is None:
+                try:
+                    collect = self.launch()
+                except Exception:
+                    with self.condition:
+                        self.alive -= 1
+                        self.condition.notify()
+                    raise
+            elif not collect.is_alive():
+                # Crashed or hung since its last use, replace it
+                with self.condition:
+                    self.unhealthy += 1
+                self.discard(collect)
+                continue
+
+            with self.condition:
+                self.leases += 1
+            return collect
+
+    def release(self, collect):
+        """Return a leased browser, recycling it once it has done max_uses searches"""
+        with self.condition:
+            self.uses[collect] = self.uses.get(collect, 0) + 1
+            worn_out = self.uses[collect] >= self.max_uses
+            if worn_out:
+                self.recycled += 1
+
+        if worn_out or self.closed:
+            self.discard(collect)
+            return
+
+        try:
+            collect.browser.get('about:blank')
+        except Exception:
+            with self.condition:
+                self.unhealthy += 1
+            self.discard(collect)
+            return
+
+        with self.condition:
+            self.idle.append(collect)
+            self.condition.notify()
+
+    @contextmanager
+    def lease(self):
+        collect = self.acquire()
+        try:
+            yield collect
+        finally:
+            self.release(collect)
+
+    def warm(self, count=None, background=False):
+        """
+        Launch browsers ahead of the first request
+
+        :param count: Browsers to start, the full pool size by default
+        :param background: Start them in a daemon thread and return immediately
+        """
+        if background:
+            threading.Thread(target=self.warm, args=(count,), daemon=True).start()
+            return
+
+        for _ in range(count or self.size):
+            with self.condition:
+                if self.closed or self.alive >= self.size:
+                    return
+                self.alive += 1
+            try:
+                collect = self.launch()
+            except Exception as e:
+                print('Browser warm-up failed - {}'.format(e))
+                with self.condition:
+                    self.alive -= 1
+                    self.condition.notify()
+                return
+            with self.condition:
+                self.idle.append(collect)
+                self.condition.notify()
+
+    def stats(self):
+        with self.condition:
+            return {
+                'size': self.size,
+                'alive': self.alive,
+                'idle': len(self.idle),
+                'launched': self.launched,
+                'recycled': self.recycled,
+                'unhealthy': self.unhealthy,
+                'leases': self.leases
+            }
+
+    def close(self):
+        """Quit idle browsers now; leased ones are quit when they are released"""
+        with self.condition:
+            self.closed = True
+            idle, self.idle = self.idle, []
+            self.condition.notify_all()
+        for collect in idle:
+            self.discard(collect)
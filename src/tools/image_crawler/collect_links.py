@@ -15,6 +15,7 @@ Copyright 2018 YoongiKim
 """
 
 import time
+from functools import lru_cache
 from selenium import webdriver
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.by import By
@@ -26,8 +27,21 @@ from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 
 
+@lru_cache(maxsize=None)
+def chromedriver_path():
+    # Resolving the driver hits the network, do it once per process
+    return ChromeDriverManager().install()
+
+
 class CollectLinks:
-    def __init__(self, no_gui=False, proxy=None):
+    def __init__(self, no_gui=False, proxy=None, keep_open=False):
+        """
+        :param no_gui: Run Chrome headless
+        :param proxy: Proxy server address
+        :param keep_open: Leave the window open after collecting so the browser can be reused (see BrowserPool)
+        """
+        self.keep_open = keep_open
+
         chrome_options = Options()
         chrome_options.add_argument('--no-sandbox')  # To maintain user cookies
         chrome_options.add_argument('--disable-dev-shm-usage')
@@ -35,7 +49,7 @@ class CollectLinks:
             chrome_options.add_argument('--headless')
         if proxy:
             chrome_options.add_argument("--proxy-server={}".format(proxy))
-        self.browser = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+        self.browser = webdriver.Chrome(service=Service(chromedriver_path()), options=chrome_options)
 
         browser_version = 'Failed to detect version'
         chromedriver_version = 'Failed to detect version'
@@ -84,62 +98,171 @@ class CollectLinks:
         self.browser.execute_script("arguments[0].setAttribute('style', arguments[1]);", element,
                                     "background: yellow; border: 2px solid red;")
 
+    def finish(self):
+        if self.keep_open:
+            self.browser.get('about:blank')
+        else:
+            self.browser.close()
+
+    def is_alive(self):
+        try:
+            return self.browser.execute_script('return 1;') == 1
+        except Exception:
+            return False
+
     @staticmethod
     def remove_duplicates(_list):
         return list(dict.fromkeys(_list))
 
-    def google(self, keyword, add_url=""):
+    def collect_srcs(self, xpath, start=0):
+        """Return the src of every element matching xpath from position start on, in one round trip"""
+        return self.browser.execute_script("""
+            var result = document.evaluate(arguments[0], document, null,
+                                           XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            var srcs = [];
+            for (var i = arguments[1]; i < result.snapshotLength; i++) {
+                srcs.push(result.snapshotItem(i).getAttribute('src'));
+            }
+            return srcs;
+        """, xpath, start)
+
+    def scroll_and_wait(self, quiet_ms):
+        """
+        Scroll to the bottom and wait until the page adds nodes or stays quiet for quiet_ms.
+
+        :return: True if new content appeared, False if the page went quiet (nothing left to load)
+        """
+        self.browser.set_script_timeout(quiet_ms / 1000 + 5)
+        return self.browser.execute_async_script("""
+            var quietMs = arguments[0], done = arguments[arguments.length - 1];
+            var timer = null;
+            var observer = new MutationObserver(function (mutations) {
+                for (var i = 0; i < mutations.length; i++) {
+                    if (mutations[i].addedNodes.length) {
+                        observer.disconnect(); clearTimeout(timer); done(true); return;
+                    }
+                }
+            });
+            observer.observe(document.body, {childList: true, subtree: true});
+            timer = setTimeout(function () { observer.disconnect(); done(false); }, quietMs);
+            window.scrollTo(0, document.body.scrollHeight);
+        """, quiet_ms)
+
+    def iter_google(self, keyword, add_url="", limit=0, deadline=30, quiet_ms=1500):
+        """
+        Yield thumbnail links as they load, so downloads can start before scrolling ends.
+
+        :param keyword: Search term
+        :param add_url: Extra query string (e.g. face search)
+        :param limit: Stop scrolling once this many candidate images are on the page (0 = scroll to the end)
+        :param deadline: Overall seconds allowed for scrolling
+        :param quiet_ms: Milliseconds without new results after which the end of the page is assumed
+        """
+        xpath = '//div[@jsname="dTDiAc"]/div[@jsname="qQjpJ"]//img'
+        give_up_at = time.monotonic() + deadline
+
         self.browser.get("https://www.google.com/search?q={}&source=lnms&tbm=isch{}".format(keyword, add_url))
 
-        time.sleep(1)
+        try:
+            WebDriverWait(self.browser, deadline).until(EC.presence_of_element_located((By.XPATH, xpath)))
+        except Exception:
+            print('No results appeared for {}'.format(keyword))
 
         print('Scrolling down')
 
-        elem = self.browser.find_element(By.TAG_NAME, "body")
-
-        last_scroll = 0
-        scroll_patience = 0
-        NUM_MAX_SCROLL_PATIENCE = 50
+        # Scroll only until enough candidates are loaded; each round waits for the
+        # page to add results instead of sleeping a fixed time
+        seen = set()
+        scanned = 0
+        quiet_rounds = 0
+        NUM_MAX_QUIET_ROUNDS = 2
 
         while True:
-            elem.send_keys(Keys.PAGE_DOWN)
-            time.sleep(0.2)
+            try:
+                srcs = self.collect_srcs(xpath, scanned)
+            except Exception as e:
+                print('[Exception occurred while collecting links from google] {}'.format(e))
+                srcs = []
+            scanned += len(srcs)
 
-            scroll = self.get_scroll()
-            if scroll == last_scroll:
-                scroll_patience += 1
-            else:
-                scroll_patience = 0
-                last_scroll = scroll
+            for src in srcs:
+                if src and src not in seen:
+                    seen.add(src)
+                    yield src
 
-            if scroll_patience >= NUM_MAX_SCROLL_PATIENCE:
+            if limit and len(seen) >= limit:
+                break
+            if time.monotonic() >= give_up_at or quiet_rounds >= NUM_MAX_QUIET_ROUNDS:
                 break
 
-        print('Scraping links')
-
-        imgs = self.browser.find_elements(By.XPATH, '//div[@jsname="dTDiAc"]/div[@jsname="qQjpJ"]//img')
-
-        links = []
-        for idx, img in enumerate(imgs):
             try:
-                src = img.get_attribute("src")
-                links.append(src)
-
+                if self.scroll_and_wait(quiet_ms):
+                    quiet_rounds = 0
+                else:
+                    quiet_rounds += 1
             except Exception as e:
-                print('[Exception occurred while collecting links from google] {}'.format(e))
+                print('[Exception occurred while scrolling google] {}'.format(e))
+                quiet_rounds += 1
 
-        links = self.remove_duplicates(links)
+        print('Collect links done. Site: {}, Keyword: {}, Total: {}'.format('google', keyword, len(seen)))
 
-        print('Collect links done. Site: {}, Keyword: {}, Total: {}'.format('google', keyword, len(links)))
-        self.browser.close()
+    def google(self, keyword, add_url="", limit=0, deadline=30, quiet_ms=1500):
+        links = list(self.iter_google(keyword, add_url, limit, deadline, quiet_ms))
+        self.finish()
 
         return links
 
-    def google_full(self, keyword, add_url="", limit=100):
+    def full_res_from_page_data(self):
+        """
+        Read full resolution image URLs from the data Google embeds in the results page.
+
+        Each result carries its original image as ["https://...", height, width] inside
+        the page's inline scripts; one execute_script pulls them all out at once.
+        """
+        return self.browser.execute_script("""
+            var pattern = /\\["(https?:\\/\\/[^"]+?)",(\\d+),(\\d+)\\]/g;
+            var urls = [], scripts = document.querySelectorAll('script'), match;
+            for (var i = 0; i < scripts.length; i++) {
+                var text = scripts[i].textContent;
+                while ((match = pattern.exec(text)) !== null) {
+                    var url;
+                    try { url = JSON.parse('"' + match[1] + '"'); } catch (e) { continue; }
+                    if (url.indexOf('gstatic.com') === -1 && url.indexOf('google.com') === -1) {
+                        urls.push(url);
+                    }
+                }
+            }
+            return urls;
+        """)
+
+    def iter_google_full(self, keyword, add_url="", limit=100):
+        """
+        Yield full resolution links, first in bulk from the page data, then by clicking
+        through the viewer only if the page data did not have enough.
+        """
         print('[Full Resolution Mode]')
 
         self.browser.get("https://www.google.com/search?q={}&tbm=isch{}".format(keyword, add_url))
-        time.sleep(1)
+
+        limit = 10000 if limit == 0 else limit
+        seen = set()
+
+        try:
+            WebDriverWait(self.browser, 10).until(
+                EC.presence_of_element_located((By.XPATH, '//div[@jsname="dTDiAc"]')))
+            for src in self.full_res_from_page_data():
+                if len(seen) >= limit:
+                    break
+                if src not in seen:
+                    seen.add(src)
+                    yield src
+        except Exception as e:
+            print('[Exception occurred while reading google_full page data] {}'.format(e))
+
+        print('Bulk extraction found {} links'.format(len(seen)))
+        if len(seen) >= limit:
+            print('Collect links done. Site: {}, Keyword: {}, Total: {}'.format('google_full', keyword, len(seen)))
+            return
 
         # Click the first image to get full resolution images
         self.wait_and_click('//div[@jsname="dTDiAc"]')
@@ -149,14 +272,12 @@ class CollectLinks:
 
         print('Scraping links')
 
-        links = []
-        limit = 10000 if limit == 0 else limit
-        count = 1
+        count = len(seen) + 1
         last_scroll = 0
         scroll_patience = 0
         NUM_MAX_SCROLL_PATIENCE = 100
 
-        while len(links) < limit:
+        while len(seen) < limit:
             try:
                 # Google renders compressed image first, and overlaps with full image later.
                 xpath = '//div[@jsname="figiqf"]//img[not(contains(@src,"gstatic.com"))]'
@@ -176,10 +297,11 @@ class CollectLinks:
                     self.highlight(imgs[0])
                     src = imgs[0].get_attribute('src')
 
-                    if src is not None and src not in links:
-                        links.append(src)
+                    if src is not None and src not in seen:
+                        seen.add(src)
                         print('%d: %s' % (count, src))
                         count += 1
+                        yield src
             except KeyboardInterrupt:
                 break
                 
@@ -201,10 +323,11 @@ class CollectLinks:
 
             body.send_keys(Keys.RIGHT)
 
-        links = self.remove_duplicates(links)
+        print('Collect links done. Site: {}, Keyword: {}, Total: {}'.format('google_full', keyword, len(seen)))
 
-        print('Collect links done. Site: {}, Keyword: {}, Total: {}'.format('google_full', keyword, len(links)))
-        self.browser.close()
+    def google_full(self, keyword, add_url="", limit=100):
+        links = list(self.iter_google_full(keyword, add_url, limit))
+        self.finish()
 
         return links
 
@@ -0,0 +1,142 @@
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageOps, features
+
+# Pillow formats for the derivative extensions
+FORMATS = {'webp': 'WEBP', 'jpg': 'JPEG'}
+
+
+def derivative_path(root, digest, size, ext):
+    return os.path.join(root, digest[:2], '{}_{}.{}'.format(digest, size, ext))
+
+
+def render_derivatives(source, root, digest, sizes, ext, quality):
+    """
+    Resize one image to every size and re-encode it, without metadata.
+
+    Runs in a worker process. Output files are content-addressed like the blobs,
+    so an image shared by several keywords is rendered once.
+
+    :return: List of {size, path, width, height, bytes}
+    """
+    results = []
+    with Image.open(source) as img:
+        # Apply the EXIF rotation before the EXIF data is dropped
+        img = ImageOps.exif_transpose(img)
+        if ext == 'jpg' or img.mode not in ('RGB', 'RGBA'):
+            # WebP keeps transparency, JPEG cannot
+            img = img.convert('RGBA' if ext == 'webp' and img.has_transparency_data else 'RGB')
+
+        for size in sorted(sizes, reverse=True):
+            path = derivative_path(root, digest, size, ext)
+            if not os.path.exists(path):
+                thumbnail = img.copy()
+                thumbnail.thumbnail((size, size), Image.LANCZOS)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.part')
+                try:
+                    with os.fdopen(fd, 'wb') as file:
+                        # No exif/icc_profile arguments: the derivative carries no metadata
+                        thumbnail.save(file, FORMATS[ext], quality=quality)
+                    os.replace(tmp_path, path)
+                except BaseException:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    raise
+            with Image.open(path) as rendered:
+                width, height = rendered.size
+            results.append({'size': size, 'path': path, 'width': width, 'height': height,
+                            'bytes': os.path.getsize(path)})
+    return results
+
+
+class DerivativeGenerator:
+    """
+    Post-download stage that makes small previews of a keyword's images.
+
+    Each image is resized to fit every size in sizes, re-encoded as WebP (JPEG
+    if Pillow has no WebP support) at the given quality and stripped of
+    metadata. Pillow's work runs in a process pool so it uses every core and
+    never holds the GIL of the chat process. The result is written to
+    <keyword_dir>/derivatives.json.
+    """
+
+    def __init__(self, sizes=(256,), ext='webp', quality=80, workers=None):
+        """
+        :param sizes: Longest side in pixels of each derivative
+        :param ext: 'webp' or 'jpg'
+        :param quality: Encoder quality, 1-100
+        :param workers: Worker processes, all cores by default
+        """
+        self.sizes = tuple(sizes)
+        self.ext = ext if ext != 'webp' or features.check('webp') else 'jpg'
+        self.quality = quality
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = None  # Started on first use
+        self.lock = threading.Lock()
+        self.rendered = 0
+        self.failed = 0
+
+    def pool(self):
+        with self.lock:
+            if self.executor is None:
+                # Workers come from a single-threaded fork server, never from the threaded chat process
+                if 'forkserver' in multiprocessing.get_all_start_methods():
+                    context = multiprocessing.get_context('forkserver')
+                else:
+                    context = multiprocessing.get_context()
+                self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            return self.executor
+
+    def generate(self, store, keyword, keyword_dir):
+        """
+        Render derivatives for every image in a keyword's manifest and write its manifest.
+
+        :param store: ImageStore holding the keyword
+        :return: The manifest as a list of {position, hash, derivatives}
+        """
+        root = os.path.join(store.root, 'derivatives')
+        images = store.manifest(keyword)
+        pool = self.pool()
+        futures = [
+            pool.submit(render_derivatives, store.blob_path(image['hash'], image['ext']), root,
+                        image['hash'], self.sizes, self.ext, self.quality)
+            for image in images
+        ]
+
+        manifest = []
+        for image, future in zip(images, futures):
+            try:
+                derivatives = future.result()
+            except Exception as e:
+                print('Derivative failed for {} - {}'.format(image['hash'], e))
+                with self.lock:
+                    self.failed += 1
+                continue
+            with self.lock:
+                self.rendered += 1
+            for derivative in derivatives:
+                derivative['path'] = os.path.relpath(derivative['path'], keyword_dir)
+            manifest.append({'position': image['position'], 'hash': image['hash'], 'derivatives': derivatives})
+
+        fd, tmp_path = tempfile.mkstemp(dir=keyword_dir, suffix='.part')
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            json.dump({'keyword': keyword, 'format': self.ext, 'quality': self.quality, 'images': manifest},
+                      file, indent=2)
+        os.replace(tmp_path, os.path.join(keyword_dir, 'derivatives.json'))
+        return manifest
+
+    def stats(self):
+        with self.lock:
+            return {'rendered': self.rendered, 'failed': self.failed, 'workers': self.workers}
+
+    def close(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=True, cancel_futures=True)
+                self.executor = None
@@ -0,0 +1,177 @@
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ImageJob:
+    """One background keyword download and the progress it has reported so far"""
+
+    def __init__(self, keyword, count, max_events=200):
+        self.id = uuid.uuid4().hex[:8]
+        self.keyword = keyword
+        self.count = count
+        self.status = 'queued'  # queued -> running -> done | failed, or queued -> cancelled
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+        self.existing = 0  # Images the keyword already had before this job
+        self.links_found = 0
+        self.downloaded = 0
+        self.validated = 0
+        self.rejected = 0
+        self.saved = 0
+
+        self.lock = threading.Lock()
+        self.events = deque(maxlen=max_events)
+        self.event_count = 0  # Events ever recorded, so readers can ask for the ones after an index
+        self.finished = threading.Event()
+
+    def record(self, event, **data):
+        """Progress callback for AutoCrawler.download_keyword_images; called from several threads"""
+        with self.lock:
+            if event == 'started':
+                self.existing = data.get('existing', 0)
+            elif event == 'link_found':
+                self.links_found += 1
+            elif event == 'downloaded':
+                self.downloaded += 1
+            elif event == 'validated':
+                self.validated += 1
+            elif event == 'rejected':
+                self.rejected += 1
+            elif event == 'saved':
+                self.saved += 1
+            self.event_count += 1
+            self.events.append({'index': self.event_count, 'event': event, 'time': time.time(),
+                                **{key: value for key, value in data.items() if key != 'link'}})
+
+    def events_since(self, index=0):
+        """Events recorded after the given event index (older ones may have been dropped)"""
+        with self.lock:
+            return [event for event in self.events if event['index'] > index]
+
+    @property
+    def total(self):
+        """Images in the keyword folder: the ones it had plus the ones saved by this job"""
+        return self.existing + self.saved
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'id': self.id,
+                'keyword': self.keyword,
+                'count': self.count,
+                'status': self.status,
+                'error': self.error,
+                'existing': self.existing,
+                'links_found': self.links_found,
+                'downloaded': self.downloaded,
+                'validated': self.validated,
+                'rejected': self.rejected,
+                'saved': self.saved,
+                'events': self.event_count,
+                'elapsed': round((self.finished_at or time.time()) - (self.started_at or self.submitted_at), 2)
+            }
+
+
+class ImageJobQueue:
+    """
+    Runs AutoCrawler keyword downloads as background jobs.
+
+    submit() returns immediately with an ImageJob whose counters and event log
+    fill in as links are found and images are downloaded, validated and saved,
+    so the chat keeps going while a long (e.g. full-resolution) crawl runs.
+    Finished jobs are kept for a while so their owner can report them later.
+    """
+
+    def __init__(self, crawler, workers=2, keep_finished=100):
+        """
+        :param crawler: AutoCrawler that runs the downloads
+        :param workers: Jobs run at the same time; more wait in the queue
+        :param keep_finished: Finished jobs kept for status lookups before the oldest are forgotten
+        """
+        self.crawler = crawler
+        self.keep_finished = keep_finished
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image-job')
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.futures = {}  # Job id -> Future while the job is queued or running
+        self.finished_order = deque()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    def submit(self, keyword, count):
+        job = ImageJob(keyword, count)
+        with self.lock:
+            self.jobs[job.id] = job
+            self.submitted += 1
+            self.futures[job.id] = self.executor.submit(self.run, job)
+        return job
+
+    def run(self, job):
+        with job.lock:
+            job.status = 'running'
+            job.started_at = time.time()
+        try:
+            ok = self.crawler.download_keyword_images(job.keyword, job.count, progress=job.record)
+            error = None if ok else 'No images could be downloaded'
+        except Exception as e:
+            error = str(e)
+
+        with job.lock:
+            job.status = 'failed' if error else 'done'
+            job.error = error
+            job.finished_at = time.time()
+        with self.lock:
+            if error:
+                self.failed += 1
+            else:
+                self.completed += 1
+            self.forget_finished(job)
+        job.finished.set()
+
+    def forget_finished(self, job):
+        """Keep at most keep_finished finished jobs. Caller holds the lock."""
+        self.futures.pop(job.id, None)
+        self.finished_order.append(job.id)
+        while len(self.finished_order) > self.keep_finished:
+            self.jobs.pop(self.finished_order.popleft(), None)
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def stats(self):
+        with self.lock:
+            running = sum(1 for job in self.jobs.values() if job.status == 'running')
+            queued = sum(1 for job in self.jobs.values() if job.status == 'queued')
+            return {
+                'submitted': self.submitted,
+                'queued': queued,
+                'running': running,
+                'completed': self.completed,
+                'failed': self.failed,
+                'cancelled': self.cancelled
+            }
+
+    def close(self):
+        """Cancel queued jobs; running ones finish in their threads"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        with self.lock:
+            cancelled = [self.jobs[job_id] for job_id, future in self.futures.items() if future.cancelled()]
+            for job in cancelled:
+                with job.lock:
+                    job.status = 'cancelled'
+                    job.error = 'Cancelled: the job queue was closed'
+                    job.finished_at = time.time()
+                self.cancelled += 1
+                self.forget_finished(job)
+        # Wake anything polling the job, e.g. report_finished_jobs
+        for job in cancelled:
+            job.finished.set()
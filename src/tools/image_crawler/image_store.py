@@ -0,0 +1,211 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Optional: without flock (e.g. Windows) keywords are only locked within one process
+    fcntl = None
+
+
+def url_key(link):
+    # data: URIs can be hundreds of KB, so every link is indexed by its digest
+    return hashlib.sha1(str(link).encode('utf-8')).hexdigest()
+
+
+class ImageStore:
+    """
+    Content-addressed storage for downloaded images.
+
+    Each image is stored once as blobs/<hash[:2]>/<hash>.<ext>, whatever keyword
+    it was found for. A SQLite index maps every fetched URL to its blob (or marks
+    it unreadable) and keeps an ordered manifest of images per keyword. The
+    usual <download_path>/<keyword>/<keyword>_<n>.<ext> files are symlinks into
+    the blob store, so an image shared by "cat" and "cats" costs one download
+    and one file, and an interrupted keyword resumes where it stopped.
+    """
+
+    def __init__(self, root, unreadable_ttl=7 * 24 * 3600):
+        """
+        :param root: Directory holding blobs/ and index.sqlite3
+        :param unreadable_ttl: Seconds a URL stays marked unreadable before it is fetched again
+        """
+        self.root = root
+        self.unreadable_ttl = unreadable_ttl
+        self.blob_dir = os.path.join(root, 'blobs')
+        self.lock_dir = os.path.join(root, 'locks')
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.lock_dir, exist_ok=True)
+
+        self.lock = threading.Lock()
+        # Several processes may share the store; wait for their writes instead of failing
+        self.db = sqlite3.connect(os.path.join(root, 'index.sqlite3'), timeout=30, check_same_thread=False)
+        self.db.executescript(
+            "CREATE TABLE IF NOT EXISTS urls ("
+            "key TEXT PRIMARY KEY, hash TEXT, ext TEXT, fetched_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS keyword_images ("
+            "keyword TEXT NOT NULL, position INTEGER NOT NULL, hash TEXT NOT NULL, ext TEXT NOT NULL, "
+            "url_key TEXT NOT NULL, PRIMARY KEY (keyword, position), UNIQUE (keyword, hash));"
+        )
+        self.db.commit()
+
+        self.url_hits = 0
+        self.dedup_hits = 0
+        self.blobs_written = 0
+        self.lock_waits = 0
+
+    def blob_path(self, digest, ext):
+        return os.path.join(self.blob_dir, digest[:2], '{}.{}'.format(digest, ext))
+
+    def lookup_url(self, link):
+        """
+        :return: (hash, ext) for a URL fetched before, ('', None) if it was unreadable, None if never fetched
+        """
+        with self.lock:
+            row = self.db.execute("SELECT hash, ext, fetched_at FROM urls WHERE key = ?",
+                                  (url_key(link),)).fetchone()
+        if row is None:
+            return None
+        digest, ext, fetched_at = row
+        if digest and not os.path.exists(self.blob_path(digest, ext)):
+            return None  # Blob was deleted by hand, fetch again
+        if not digest and fetched_at < time.time() - self.unreadable_ttl:
+            return None  # The page may serve an image by now, try once more
+        with self.lock:
+            self.url_hits += 1
+        return (digest or '', ext)
+
+    def mark_unreadable(self, link):
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO urls (key, hash, ext, fetched_at) VALUES (?, NULL, NULL, ?)",
+                            (url_key(link), time.time()))
+            self.db.commit()
+
+    def put(self, data, ext, link=None):
+        """
+        Store image bytes under their content hash, writing the blob only if it is new.
+
+        :return: Content hash
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest, ext)
+
+        if os.path.exists(path):
+            with self.lock:
+                self.dedup_hits += 1
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary file and rename, so a blob is never seen half-written
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.part')
+            try:
+                with os.fdopen(fd, 'wb') as file:
+                    file.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            with self.lock:
+                self.blobs_written += 1
+
+        if link is not None:
+            with self.lock:
+                self.db.execute("INSERT OR REPLACE INTO urls (key, hash, ext, fetched_at) VALUES (?, ?, ?, ?)",
+                                (url_key(link), digest, ext, time.time()))
+                self.db.commit()
+        return digest
+
+    def keyword_count(self, keyword):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM keyword_images WHERE keyword = ?", (keyword,)).fetchone()[0]
+
+    def keyword_urls(self, keyword):
+        """URL keys already in a keyword's manifest, to skip them when resuming"""
+        with self.lock:
+            rows = self.db.execute("SELECT url_key FROM keyword_images WHERE keyword = ?", (keyword,)).fetchall()
+        return {row[0] for row in rows}
+
+    def add_to_keyword(self, keyword, keyword_dir, digest, ext, link):
+        """
+        Append a stored image to a keyword's manifest and link it into the keyword folder.
+
+        :return: Path of the keyword file, or None if the keyword already has this image
+        """
+        with self.lock:
+            exists = self.db.execute("SELECT 1 FROM keyword_images WHERE keyword = ? AND hash = ?",
+                                     (keyword, digest)).fetchone()
+            if exists:
+                return None
+            position = self.db.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM keyword_images "
+                                       "WHERE keyword = ?", (keyword,)).fetchone()[0]
+            self.db.execute("INSERT INTO keyword_images (keyword, position, hash, ext, url_key) VALUES (?, ?, ?, ?, ?)",
+                            (keyword, position, digest, ext, url_key(link)))
+            self.db.commit()
+
+        path = os.path.join(keyword_dir, '{}_{}.{}'.format(keyword, str(position).zfill(4), ext))
+        self.link_blob(self.blob_path(digest, ext), path)
+        return path
+
+    @staticmethod
+    def link_blob(blob, path):
+        if os.path.lexists(path):
+            os.remove(path)
+        try:
+            os.symlink(os.path.relpath(blob, os.path.dirname(path)), path)
+        except (OSError, NotImplementedError):
+            # No symlinks (e.g. Windows without developer mode): hard link, else copy
+            try:
+                os.link(blob, path)
+            except OSError:
+                shutil.copyfile(blob, path)
+
+    @contextmanager
+    def lock_keyword(self, keyword):
+        """
+        Hold an exclusive lock on a keyword's folder and manifest.
+
+        An flock on locks/<key>.lock, so crawls of the same keyword are serialized
+        across threads and across processes sharing the download folder.
+        """
+        with open(os.path.join(self.lock_dir, '{}.lock'.format(url_key(keyword))), 'a+') as lock_file:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    with self.lock:
+                        self.lock_waits += 1
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def manifest(self, keyword):
+        """Ordered list of {position, hash, ext} for a keyword"""
+        with self.lock:
+            rows = self.db.execute("SELECT position, hash, ext FROM keyword_images WHERE keyword = ? "
+                                   "ORDER BY position", (keyword,)).fetchall()
+        return [{'position': position, 'hash': digest, 'ext': ext} for position, digest, ext in rows]
+
+    def stats(self):
+        with self.lock:
+            return {
+                'urls': self.db.execute("SELECT COUNT(*) FROM urls").fetchone()[0],
+                'keywords': self.db.execute("SELECT COUNT(DISTINCT keyword) FROM keyword_images").fetchone()[0],
+                'url_hits': self.url_hits,
+                'dedup_hits': self.dedup_hits,
+                'blobs_written': self.blobs_written,
+                'lock_waits': self.lock_waits
+            }
+
+    def close(self):
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
@@ -0,0 +1,242 @@
+from html.parser import HTMLParser
+from urllib.parse import quote_plus
+
+from src.transport.http_transport import get_transport
+
+
+class SearchBackend:
+    """
+    Source of image links for AutoCrawler.
+
+    iter_links() is a generator so downloads can start on the first link; the
+    crawler closes it once enough images are saved, and a backend releases
+    whatever it holds (a leased browser, a response) in its finally block.
+    """
+
+    name = 'backend'
+    full_resolution = False  # Whether the backend can return original images instead of thumbnails
+
+    def iter_links(self, keyword, add_url='', limit=0, full_resolution=False):
+        """
+        :param keyword: Search term
+        :param add_url: Extra query string (e.g. face search)
+        :param limit: Candidates wanted, 0 for as many as the backend finds
+        :param full_resolution: Yield original images instead of thumbnails
+        """
+        raise NotImplementedError
+
+
+class ImageSrcParser(HTMLParser):
+    """Collects absolute http(s) <img src> values in document order"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.srcs = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag != 'img':
+            return
+        for name, value in attrs:
+            if name == 'src' and value and value.startswith(('http://', 'https://')):
+                self.srcs.append(value)
+                return
+
+
+def parse_image_links(html):
+    """
+    Image result URLs in a Google basic-HTML results page, without duplicates.
+
+    The page Google serves to clients without JavaScript lists each result as a
+    plain <img> pointing at its gstatic thumbnail; logos and icons are relative
+    or under /images/branding and are dropped.
+    """
+    parser = ImageSrcParser()
+    parser.feed(html)
+    parser.close()
+    links = [src for src in parser.srcs if '/images/branding/' not in src and 'google.com/logos' not in src]
+    return list(dict.fromkeys(links))
+
+
+class HttpSearchBackend(SearchBackend):
+    """
+    Thumbnail search over plain HTTP.
+
+    Fetches Google's basic-HTML image results page by page and parses the
+    thumbnails out with the standard library HTML parser, so no browser is
+    started. Costs a few MB and one request per ~20 results.
+    """
+
+    name = 'http'
+    full_resolution = False
+
+    URL = 'https://www.google.com/search?q={}&tbm=isch{}&start={}'
+    # A plain user agent gets the no-JavaScript page that lists results as <img> tags
+    HEADERS = {'User-Agent': 'Mozilla/5.0 (compatible)', 'Accept-Language': 'en-US,en;q=0.8'}
+
+    def __init__(self, fetch=None, max_pages=10, timeout=10):
+        """
+        :param fetch: Callable (url) -> HTML text. Defaults to a GET through the shared transport;
+                      pass one that reads recorded pages to test without the network
+        :param max_pages: Result pages fetched at most per search
+        :param timeout: Seconds allowed per page request
+        """
+        self.fetch = fetch or self.fetch_page
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self.warned_empty = False
+
+    def fetch_page(self, url):
+        response = get_transport().get(url, headers=self.HEADERS, timeout=self.timeout)
+        try:
+            response.raise_for_status()
+            return response.text
+        finally:
+            response.close()
+
+    def iter_links(self, keyword, add_url='', limit=0, full_resolution=False):
+        seen = set()
+        start = 0
+        for _ in range(self.max_pages):
+            links = parse_image_links(self.fetch(self.URL.format(quote_plus(keyword), add_url, start)))
+            new_links = [link for link in links if link not in seen]
+            if not new_links:
+                break  # Past the last page
+            for link in new_links:
+                seen.add(link)
+                yield link
+                if limit and len(seen) >= limit:
+                    return
+            start += len(links)
+
+        if not seen and not self.warned_empty:
+            # Once is enough: it usually means every search now falls back to the browser
+            self.warned_empty = True
+            print('HTTP image search found no links for "{}". Google may no longer serve its basic-HTML '
+                  'results page; searches will fall back to the browser if one is configured'.format(keyword))
+        print('Collect links done. Site: {}, Keyword: {}, Total: {}'.format('google (http)', keyword, len(seen)))
+
+
+class SeleniumSearchBackend(SearchBackend):
+    """Google Images through a Chrome leased from a BrowserPool (thumbnails and full resolution)"""
+
+    name = 'selenium'
+    full_resolution = True
+
+    def __init__(self, browser_pool):
+        """
+        :param browser_pool: BrowserPool to lease a browser from for each search
+        """
+        self.browser_pool = browser_pool
+
+    def iter_links(self, keyword, add_url='', limit=0, full_resolution=False):
+        # Lease a warm browser (launched with a random proxy if a proxy list is set)
+        collect = self.browser_pool.acquire()
+        try:
+            if full_resolution:
+                yield from collect.iter_google_full(keyword, add_url, limit)
+            else:
+                yield from collect.iter_google(keyword, add_url, limit=limit)
+        finally:
+            # Return the browser to the pool for the next keyword
+            self.browser_pool.release(collect)
+
+
+def iter_with_fallback(backends, keyword, add_url='', limit=0, full_resolution=False):
+    """
+    Yield links from the first backend, moving on to the next one only when a
+    backend fails or runs out before limit. Links already yielded are skipped,
+    so a fallback extends the earlier results instead of repeating them. Since
+    the crawler stops consuming once it has enough images, later backends (the
+    browser) are never started when an earlier one suffices.
+    """
+    if full_resolution:
+        check_full_resolution(backends)
+        backends = [backend for backend in backends if backend.full_resolution]
+
+    seen = set()
+    for backend in backends:
+        links = backend.iter_links(keyword, add_url, limit, full_resolution)
+        try:
+            for link in links:
+                if link not in seen:
+                    seen.add(link)
+                    yield link
+        except Exception as e:
+            print('Search backend "{}" failed - {}'.format(backend.name, e))
+        finally:
+            # Releases the backend's browser as soon as the crawler stops reading
+            links.close()
+        if limit and len(seen) >= limit:
+            return
+        print('Search backend "{}" found {} links, trying the next one'.format(backend.name, len(seen)))
+
+
+def check_full_resolution(backends):
+    """Raise ValueError unless one of the backends can return full-resolution images"""
+    if not any(backend.full_resolution for backend in backends):
+        raise ValueError('Full-resolution downloads need the browser, but the search backends ({}) only return '
+                         'thumbnails. Set IMAGE_SEARCH_BACKEND to auto or selenium'.format(
+                             ', '.join(backend.name for backend in backends)))
+
+
+def make_search_backends(name, browser_pool):
+    """
+    Backends for an IMAGE_SEARCH_BACKEND setting
+
+    :param name: 'selenium' (default), or opt-in 'auto' (HTTP, then the browser as fallback) or 'http'
+    :param browser_pool: BrowserPool for the Selenium backend
+    """
+    # The HTTP parser has only been checked against a reconstructed page (see
+    # fixtures/), so it stays opt-in until it is checked against a recorded one
+    if name == 'http':
+        return [HttpSearchBackend()]
+    if name == 'auto':
+        return [HttpSearchBackend(), SeleniumSearchBackend(browser_pool)]
+    return [SeleniumSearchBackend(browser_pool)]
+
+
+if __name__ == '__main__':
+    import os
+    import sys
+
+    fixture_path = os.path.join(os.path.dirname(__file__), 'fixtures', 'google_images_cats.html')
+    if '--record' in sys.argv:
+        # Saves the live page; update EXPECTED_* below to the links it prints
+        html = HttpSearchBackend().fetch_page(HttpSearchBackend.URL.format('cats', '', 0))
+        with open(fixture_path, 'w', encoding='utf-8') as file:
+            file.write(html)
+        links = parse_image_links(html)
+        print('Recorded {} links to {}'.format(len(links), fixture_path))
+        print('\n'.join(links))
+        sys.exit(0)
+
+    EXPECTED_COUNT = 20
+    EXPECTED_FIRST = 'https://encrypted-tbn0.gstatic.com/images?q=tbn:ANd9GcShEkzk2MnxBx8NJwv69wiDPdwwVlVpSCskcj38&s'
+    EXPECTED_LAST = 'https://encrypted-tbn0.gstatic.com/images?q=tbn:ANd9GcaEZYEZ8xVEdLWNN23wyoENVs7Lw3R5JwjY7E1r&s'
+
+    with open(fixture_path, encoding='utf-8') as file:
+        fixture = file.read()
+    links = parse_image_links(fixture)
+    print('Parsed {} links from {}'.format(len(links), os.path.basename(fixture_path)))
+    # Logos (relative or under /images/branding) are dropped, results keep page order
+    assert len(links) == EXPECTED_COUNT, len(links)
+    assert links[0] == EXPECTED_FIRST and links[-1] == EXPECTED_LAST, (links[0], links[-1])
+    assert all(link.startswith('https://encrypted-tbn0.gstatic.com/') for link in links)
+
+    # One recorded page, then an empty second page: the backend stops after the first
+    pages = {0: fixture}
+    backend = HttpSearchBackend(fetch=lambda url: pages.get(int(url.rsplit('start=', 1)[1]), ''))
+    assert list(backend.iter_links('cats', limit=5)) == links[:5]
+    assert list(backend.iter_links('cats')) == links
+
+    # A page without results logs the fallback warning once
+    empty = HttpSearchBackend(fetch=lambda url: '<html><body></body></html>')
+    assert list(empty.iter_links('cats')) == [] and empty.warned_empty
+
+    # Thumbnail-only backends refuse full-resolution crawls instead of yielding nothing
+    try:
+        list(iter_with_fallback([backend], 'cats', full_resolution=True))
+        raise AssertionError('full resolution over HTTP only should fail')
+    except ValueError as e:
+        print(e)
+    print('OK')
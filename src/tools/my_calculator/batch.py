@@ -0,0 +1,275 @@
+import ast
+from collections import OrderedDict
+
+try:
+    import numpy as np
+except ImportError:  # A declared dependency, but batches still work row by row without it
+    np = None
+
+from .engine import (BINARY_OPERATORS, MAX_EXPRESSION_LENGTH, UNARY_OPERATORS, ExpressionTooLongError,
+                     UnsupportedExpressionError)
+
+# Largest number of rows accepted in one batch
+MAX_BATCH_ROWS = 1_000_000
+
+
+def build_kernel(node, variables):
+    """
+    Compile a whitelisted AST into a kernel(env, zero_divisions) closure.
+
+    The same kernel works on NumPy arrays (one call for the whole batch) and
+    on plain floats (one call per row). Divisions append their zero-denominator
+    mask to zero_divisions so failed rows can be reported precisely.
+    """
+    if isinstance(node, ast.Expression):
+        return build_kernel(node.body, variables)
+
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        # NumPy scalars overflow to inf like the arrays instead of raising
+        value = np.float64(node.value) if np is not None else float(node.value)
+        return lambda env, zero_divisions: value
+
+    if isinstance(node, ast.Name) and node.id in variables:
+        name = node.id
+        return lambda env, zero_divisions: env[name]
+
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        op = BINARY_OPERATORS[type(node.op)]
+        left = build_kernel(node.left, variables)
+        right = build_kernel(node.right, variables)
+
+        if type(node.op) in (ast.Div, ast.FloorDiv):
+            def divide(env, zero_divisions):
+                denominator = right(env, zero_divisions)
+                zero_divisions.append(denominator == 0)
+                return op(left(env, zero_divisions), denominator)
+            return divide
+        return lambda env, zero_divisions: op(left(env, zero_divisions), right(env, zero_divisions))
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+        op = UNARY_OPERATORS[type(node.op)]
+        operand = build_kernel(node.operand, variables)
+        return lambda env, zero_divisions: op(operand(env, zero_divisions))
+
+    if isinstance(node, ast.Name):
+        raise UnsupportedExpressionError(f"Unknown variable: {node.id}")
+    raise UnsupportedExpressionError(f"Unsupported element in expression: {type(node).__name__}")
+
+
+def parse_template(expression):
+    expression = expression.strip().replace('^', '**')
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionTooLongError(f"Expression too long (max {MAX_EXPRESSION_LENGTH} characters)")
+    return expression, ast.parse(expression, mode="eval")
+
+
+def row_error(value, zero_division):
+    if zero_division:
+        return "Division by zero"
+    if value != value:  # NaN
+        return "Result is not a real number"
+    return "Result too large"
+
+
+def evaluate_vectorized(kernel, columns, rows):
+    """Evaluate a kernel over NumPy columns, returning (results, errors)"""
+    zero_divisions = []
+    with np.errstate(all="ignore"):
+        results = np.asarray(kernel(columns, zero_divisions), dtype=np.float64)
+    results = np.broadcast_to(results, (rows,)).copy()
+
+    failed = ~np.isfinite(results)
+    zero_mask = np.zeros(rows, dtype=bool)
+    for mask in zero_divisions:
+        zero_mask |= np.broadcast_to(np.asarray(mask, dtype=bool), (rows,))
+    failed |= zero_mask
+
+    # Classify from the raw values (inf = overflow, NaN = not real) before they are replaced
+    errors = {int(row): row_error(results[row], zero_mask[row]) for row in np.flatnonzero(failed)}
+    results[failed] = np.nan
+    return results, errors
+
+
+def evaluate_rows(kernel, columns, rows):
+    """Pure-Python fallback: evaluate a kernel row by row, returning (results, errors)"""
+    results = []
+    errors = {}
+    for row in range(rows):
+        env = {name: values[row] for name, values in columns.items()}
+        zero_divisions = []
+        try:
+            value = kernel(env, zero_divisions)
+            if isinstance(value, complex):
+                raise ValueError("complex result")
+            if value in (float("inf"), float("-inf")):
+                raise OverflowError("Result too large")
+            results.append(float(value))
+        except ZeroDivisionError:
+            results.append(float("nan"))
+            errors[row] = "Division by zero"
+        except OverflowError:
+            results.append(float("nan"))
+            errors[row] = "Result too large"
+        except Exception:
+            results.append(float("nan"))
+            errors[row] = "Result is not a real number"
+    return results, errors
+
+
+def evaluate_template(expression, bindings):
+    """
+    Evaluate one expression template over arrays of variable bindings
+
+    Args:
+        expression (str): Template such as "x * 1.1" or "price * (1 - discount)"
+        bindings (dict): Variable name -> list/array of numbers, all the same length
+
+    Returns:
+        dict: {
+            "results": float64 array (NaN on failed rows), or list without NumPy,
+            "errors": {row index: message} for failed rows,
+            "error": str or None for errors affecting the whole batch,
+            "expression": str
+        }
+    """
+    try:
+        expression, tree = parse_template(expression)
+        if not bindings:
+            raise ValueError("No variable bindings given")
+
+        lengths = {len(values) for values in bindings.values()}
+        if len(lengths) != 1:
+            raise ValueError("All variable bindings must have the same length")
+        rows = lengths.pop()
+        if rows > MAX_BATCH_ROWS:
+            raise ValueError(f"Batch larger than {MAX_BATCH_ROWS} rows")
+
+        kernel = build_kernel(tree, set(bindings))
+        if np is not None:
+            columns = {name: np.asarray(values, dtype=np.float64) for name, values in bindings.items()}
+            results, errors = evaluate_vectorized(kernel, columns, rows)
+        else:
+            columns = {name: [float(value) for value in values] for name, values in bindings.items()}
+            results, errors = evaluate_rows(kernel, columns, rows)
+
+        return {"results": results, "errors": errors, "error": None, "expression": expression}
+
+    except UnsupportedExpressionError as e:
+        error = str(e)
+    except Exception as e:
+        error = f"Invalid batch: {str(e)}"
+    return {"results": [], "errors": {}, "error": error, "expression": expression}
+
+
+class ConstantLifter(ast.NodeTransformer):
+    """Replace numeric literals with c0, c1, ... so same-shaped expressions share a kernel"""
+
+    def __init__(self):
+        self.constants = []
+
+    def visit_Constant(self, node):
+        if type(node.value) not in (int, float):
+            return node
+        name = f"c{len(self.constants)}"
+        self.constants.append(float(node.value))
+        return ast.copy_location(ast.Name(id=name, ctx=ast.Load()), node)
+
+
+def evaluate_many(expressions):
+    """
+    Evaluate many independent expressions at once
+
+    Expressions with the same shape (e.g. "2 + 3" and "10 + 7") are grouped and
+    evaluated as one vectorized kernel with their literals as columns.
+
+    Args:
+        expressions (list): Expression strings
+
+    Returns:
+        dict: {
+            "results": float64 array (NaN on failed rows), or list without NumPy,
+            "errors": {row index: message} for failed rows,
+            "error": str or None,
+            "expression": list of the normalized expressions
+        }
+    """
+    if len(expressions) > MAX_BATCH_ROWS:
+        return {"results": [], "errors": {}, "error": f"Batch larger than {MAX_BATCH_ROWS} rows",
+                "expression": []}
+
+    rows = len(expressions)
+    results = np.full(rows, np.nan) if np is not None else [float("nan")] * rows
+    errors = {}
+    normalized = []
+    groups = OrderedDict()  # shape -> (tree, [row], [constants])
+
+    for row, expression in enumerate(expressions):
+        try:
+            expression, tree = parse_template(str(expression))
+            if any(isinstance(node, ast.Name) for node in ast.walk(tree)):
+                raise UnsupportedExpressionError("Variables are only allowed in templates")
+            lifter = ConstantLifter()
+            tree = ast.fix_missing_locations(lifter.visit(tree))
+            shape = ast.dump(tree)
+            group = groups.setdefault(shape, (tree, [], []))
+            group[1].append(row)
+            group[2].append(lifter.constants)
+        except ExpressionTooLongError as e:
+            errors[row] = str(e)
+        except UnsupportedExpressionError:
+            errors[row] = "Invalid characters in expression. Only numbers and +, -, *, /, (, ), ^ allowed."
+        except Exception as e:
+            errors[row] = f"Invalid expression: {str(e)}"
+        normalized.append(expression)
+
+    for tree, group_rows, constants in groups.values():
+        names = [f"c{index}" for index in range(len(constants[0]))]
+        try:
+            kernel = build_kernel(tree, set(names))
+        except UnsupportedExpressionError:
+            for row in group_rows:
+                errors[row] = "Invalid characters in expression. Only numbers and +, -, *, /, (, ), ^ allowed."
+            continue
+        if np is not None:
+            table = np.asarray(constants, dtype=np.float64).reshape(len(group_rows), len(names))
+            columns = {name: table[:, index] for index, name in enumerate(names)}
+            group_results, group_errors = evaluate_vectorized(kernel, columns, len(group_rows))
+            results[np.asarray(group_rows)] = group_results
+        else:
+            columns = {name: [row_constants[index] for row_constants in constants] for index, name in enumerate(names)}
+            group_results, group_errors = evaluate_rows(kernel, columns, len(group_rows))
+            for row, value in zip(group_rows, group_results):
+                results[row] = value
+        for position, message in group_errors.items():
+            errors[group_rows[position]] = message
+
+    return {"results": results, "errors": dict(sorted(errors.items())), "error": None, "expression": normalized}
+
+
+def calculator_batch(expression=None, bindings=None, expressions=None):
+    """
+    Batch entry point for the calculator tool
+
+    Either pass an expression template with bindings, or a list of expressions.
+    Uses NumPy-vectorized kernels when NumPy is installed.
+    """
+    if expressions is not None:
+        return evaluate_many(list(expressions))
+    if expression is not None:
+        return evaluate_template(expression, bindings or {})
+    return {"results": [], "errors": {}, "error": "Nothing to evaluate", "expression": None}
+
+
+if __name__ == "__main__":
+    template = calculator_batch(expression="x * 1.1", bindings={"x": [10, 20, 35]})
+    print(f"x * 1.1: {[float(value) for value in template['results']]} {template['errors']}")
+
+    many = calculator_batch(expressions=["2 + 3", "10 + 7", "1 / 0", "(-8) ** 0.5", "2**1000000", "5 + hello"])
+    for row, expression in enumerate(many["expression"]):
+        print(f"{expression!r}: {many['errors'].get(row, many['results'][row])}")
+    assert many["errors"] == {
+        2: "Division by zero",
+        3: "Result is not a real number",
+        4: "Result too large",
+        5: "Invalid characters in expression. Only numbers and +, -, *, /, (, ), ^ allowed.",
+    }, many["errors"]
@@ -1,16 +1,22 @@
-import re
-import math
+from fractions import Fraction
 
-def calculator_tool(expression):
+from .engine import evaluate, ExpressionTooLongError, UnsupportedExpressionError, ResultTooLargeError
+
+def calculator_tool(expression, exact=None):
     """
     Simple calculator tool for LLM chatbot
     
+    Expressions are parsed to an AST, checked against a whitelist of number and
+    arithmetic nodes, and compiled once (see engine.compile_expression), so no
+    eval is involved and repeated expressions skip parsing.
+    
     Args:
         expression (str): Mathematical expression like "83478 * 990" or "2 + 3 * 4"
+        exact (str, optional): "fraction" or "decimal" for exact arithmetic, floats by default
     
     Returns:
         dict: {
-            "result": float/int or None,
+            "result": float/int (Fraction/Decimal in exact mode) or None,
             "error": str or None,
             "expression": str (the input expression)
         }
@@ -20,36 +26,24 @@ def calculator_tool(expression):
         # Clean the expression - remove extra spaces
         expression = expression.strip()
         
-        # Basic security check - only allow safe characters
-        allowed_pattern = r'^[0-9+\-*/().\s^]+$'
-        if not re.match(allowed_pattern, expression):
-            return {
-                "result": None,
-                "error": "Invalid characters in expression. Only numbers and +, -, *, /, (, ), ^ allowed.",
-                "expression": expression
-            }
-        
         # Replace ^ with ** for Python power operator
         expression = expression.replace('^', '**')
         
-        # Evaluate the expression safely
-        # Using eval with restricted builtins for safety
-        allowed_names = {
-            "__builtins__": {
-                "abs": abs,
-                "round": round,
-                "pow": pow,
-                "max": max,
-                "min": min
-            },
-            "math": math
-        }
+        result = evaluate(expression, exact)
         
-        result = eval(expression, allowed_names)
+        # e.g. (-8) ** (1/3) gives a complex number
+        if isinstance(result, complex):
+            return {
+                "result": None,
+                "error": "Result is not a real number",
+                "expression": expression
+            }
         
         # Convert to int if it's a whole number for cleaner output
         if isinstance(result, float) and result.is_integer():
             result = int(result)
+        elif isinstance(result, Fraction) and result.denominator == 1:
+            result = result.numerator
             
         return {
             "result": result,
@@ -57,12 +51,30 @@ def calculator_tool(expression):
             "expression": expression
         }
         
+    except ExpressionTooLongError as e:
+        return {
+            "result": None,
+            "error": str(e),
+            "expression": expression
+        }
+    except UnsupportedExpressionError:
+        return {
+            "result": None,
+            "error": "Invalid characters in expression. Only numbers and +, -, *, /, (, ), ^ allowed.",
+            "expression": expression
+        }
     except ZeroDivisionError:
         return {
             "result": None,
             "error": "Division by zero",
             "expression": expression
         }
+    except (ResultTooLargeError, OverflowError, MemoryError):
+        return {
+            "result": None,
+            "error": "Result too large",
+            "expression": expression
+        }
     except Exception as e:
         return {
             "result": None,
@@ -83,6 +95,9 @@ def test_calculator():
         "sqrt(16)",  # This will fail - not supported
         "10 / 0",   # Division by zero
         "5 + hello", # Invalid expression
+        "9**9**9",  # Refused instead of hanging
+        "0.5 ** 100000",  # Shrinks to 0, not refused
+        "1e308 * 10",  # Float overflow is reported, not returned as inf
     ]
     
     print("TESTING CALCULATOR TOOL:")
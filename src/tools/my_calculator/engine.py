@@ -0,0 +1,173 @@
+import ast
+import math
+import operator
+from decimal import Decimal, DivisionUndefined, InvalidOperation, localcontext
+from fractions import Fraction
+from functools import lru_cache
+
+# Longest expression accepted, parsing very long inputs is itself a cost
+MAX_EXPRESSION_LENGTH = 1000
+
+# Largest result magnitude (in decimal digits) an operation may produce. Kept under
+# Python's default int-to-str limit (4300 digits) so accepted results can be shown
+MAX_RESULT_DIGITS = 4000
+
+# Working precision for exact="decimal"
+DECIMAL_PRECISION = 50
+
+EXACT_MODES = (None, "fraction", "decimal")
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Pow: operator.pow,
+}
+
+UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+
+class UnsupportedExpressionError(ValueError):
+    """The expression uses syntax outside the calculator's whitelist"""
+
+
+class ExpressionTooLongError(UnsupportedExpressionError):
+    """The expression is longer than MAX_EXPRESSION_LENGTH characters"""
+
+
+class ResultTooLargeError(OverflowError):
+    """An operation would produce a number too large to compute quickly"""
+
+
+def magnitude_digits(value):
+    """Approximate number of decimal digits in the integer part of value (negative for |value| < 1)"""
+    if value == 0:
+        return 0.0
+    if isinstance(value, Fraction):
+        return math.log10(abs(value.numerator)) - math.log10(value.denominator)
+    if isinstance(value, Decimal):
+        return float(abs(value).log10())
+    return math.log10(abs(value))
+
+
+def check_finite(result):
+    """Floats overflow to inf silently; report that like the other too-large results"""
+    if isinstance(result, float) and not math.isfinite(result):
+        raise ResultTooLargeError("Result too large")
+    return result
+
+
+def check_printable(result):
+    """Ints and Fractions over sys.get_int_max_str_digits() digits cannot be shown; refuse them"""
+    if isinstance(result, (int, Fraction)):
+        try:
+            str(result)
+        except ValueError:
+            raise ResultTooLargeError("Result too large") from None
+    return result
+
+
+def guarded_pow(base, exponent):
+    """base ** exponent, refusing results like 9**9**9 that would pin a CPU for minutes"""
+    if base != 0 and abs(base) != 1:
+        # Digits of the result: positive when it grows, negative when it shrinks towards 0
+        digits = float(exponent) * magnitude_digits(base)
+        # Shrinking floats just underflow to 0, but an exact Fraction still carries every digit
+        if digits > MAX_RESULT_DIGITS or (isinstance(base, Fraction) and -digits > MAX_RESULT_DIGITS):
+            raise ResultTooLargeError("Result too large")
+    return check_finite(operator.pow(base, exponent))
+
+
+def guarded_mul(left, right):
+    """left * right, refusing exact products with more than MAX_RESULT_DIGITS digits"""
+    if not isinstance(left, float) and not isinstance(right, float) and left != 0 and right != 0:
+        if magnitude_digits(left) + magnitude_digits(right) > MAX_RESULT_DIGITS:
+            raise ResultTooLargeError("Result too large")
+    return check_finite(operator.mul(left, right))
+
+
+GUARDED_OPERATORS = {
+    ast.Mult: guarded_mul,
+    ast.Pow: guarded_pow,
+}
+
+
+def make_constant(value, exact):
+    """Convert a numeric literal for the chosen exact mode"""
+    if exact == "fraction":
+        return Fraction(str(value))
+    if exact == "decimal":
+        return Decimal(str(value))
+    return value
+
+
+def build_evaluator(node, exact):
+    """Turn a whitelisted AST node into a zero-argument closure that computes it"""
+    if isinstance(node, ast.Expression):
+        return build_evaluator(node.body, exact)
+
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        value = make_constant(node.value, exact)
+        return lambda: value
+
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        op = GUARDED_OPERATORS.get(type(node.op), BINARY_OPERATORS[type(node.op)])
+        left = build_evaluator(node.left, exact)
+        right = build_evaluator(node.right, exact)
+        return lambda: op(left(), right())
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+        op = UNARY_OPERATORS[type(node.op)]
+        operand = build_evaluator(node.operand, exact)
+        return lambda: op(operand())
+
+    raise UnsupportedExpressionError(f"Unsupported element in expression: {type(node).__name__}")
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(expression, exact=None):
+    """
+    Parse and compile an expression once; repeated expressions hit the LRU cache
+
+    Args:
+        expression (str): Expression using numbers and + - * / // ** ( ) only
+        exact (str, optional): None for floats, "fraction" or "decimal" for exact arithmetic
+
+    Returns:
+        callable: Zero-argument evaluator
+
+    Raises:
+        ExpressionTooLongError: For expressions over MAX_EXPRESSION_LENGTH characters
+        UnsupportedExpressionError: For anything outside the whitelist
+        SyntaxError: For malformed expressions
+    """
+    if exact not in EXACT_MODES:
+        raise ValueError(f"Unknown exact mode: {exact}")
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionTooLongError(f"Expression too long (max {MAX_EXPRESSION_LENGTH} characters)")
+
+    tree = ast.parse(expression, mode="eval")
+    return build_evaluator(tree, exact)
+
+
+def evaluate(expression, exact=None):
+    """Compile (or reuse) and evaluate an expression"""
+    evaluator = compile_expression(expression, exact)
+    if exact == "decimal":
+        with localcontext() as context:
+            context.prec = DECIMAL_PRECISION
+            try:
+                return evaluator()
+            except InvalidOperation as e:
+                # Same messages as the float path instead of the decimal signal list
+                # (the C decimal module raises InvalidOperation([DivisionUndefined]) for 0/0)
+                conditions = e.args[0] if e.args and isinstance(e.args[0], list) else [type(e)]
+                if any(issubclass(condition, DivisionUndefined) for condition in conditions):
+                    raise ZeroDivisionError("Division by zero") from None
+                raise ValueError("Result is not a real number") from None
+    return check_printable(check_finite(evaluator()))
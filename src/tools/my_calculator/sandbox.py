@@ -0,0 +1,248 @@
+import asyncio
+import math
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Optional: without rlimits (e.g. Windows) only the wall-clock timeout applies
+    resource = None
+
+from .calculator import calculator_tool
+from .batch import calculator_batch
+
+# Functions a worker may run, looked up by name so only names cross the pipe
+TASKS = {
+    "calculator": calculator_tool,
+    "batch": calculator_batch,
+}
+
+
+def address_space_in_use():
+    """Current virtual memory size of this process in bytes, or 0 if unknown"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def limit_memory(memory_bytes):
+    """Cap further address-space growth of the calling process at memory_bytes"""
+    if resource is None or not memory_bytes:
+        return
+    limit = address_space_in_use() + memory_bytes
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def limit_cpu(cpu_seconds):
+    """
+    Allow the calling process cpu_seconds more CPU time before SIGXCPU kills it
+
+    RLIMIT_CPU counts the whole lifetime of the process, so the soft limit is
+    moved forward before every evaluation to make it a per-evaluation budget.
+    """
+    if resource is None or not cpu_seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    limit = math.ceil(usage.ru_utime + usage.ru_stime + cpu_seconds)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+
+
+def worker_main(connection, cpu_seconds, memory_bytes):
+    """
+    Worker loop: receive (task, args, kwargs), send back the task's result dict
+
+    Sends None if the task failed, and only {"error": ...} if its result was too large to send.
+    """
+    limit_memory(memory_bytes)
+    while True:
+        try:
+            task, args, kwargs = connection.recv()
+        except (EOFError, OSError):
+            return
+        limit_cpu(cpu_seconds)
+        try:
+            result = TASKS[task](*args, **kwargs)
+        except Exception:  # e.g. MemoryError from the address-space limit
+            result = None
+        try:
+            connection.send(result)
+        except MemoryError:
+            # Pickling a huge result can hit the address-space limit after the task succeeded
+            connection.send({"error": "Result too large"})
+
+
+class SandboxWorker:
+    """One pre-forked worker process and the parent's end of its pipe"""
+
+    def __init__(self, context, cpu_seconds, memory_bytes):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(
+            target=worker_main,
+            args=(child_connection, cpu_seconds, memory_bytes),
+            daemon=True
+        )
+        self.process.start()
+        child_connection.close()
+
+    def kill(self):
+        self.connection.close()
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+
+
+class CalculatorSandbox:
+    """
+    Pre-forked process pool that evaluates calculator expressions under limits.
+
+    Each evaluation gets a CPU-time budget (RLIMIT_CPU) and each worker a
+    memory ceiling (RLIMIT_AS), with a wall-clock timeout on top. A worker that
+    is killed or times out is replaced before the next caller gets it, and the
+    caller receives the usual {"result", "error", "expression"} dict with an
+    error message instead of an exception.
+    """
+
+    def __init__(self, workers=2, cpu_seconds=2, memory_mb=256, timeout=5.0):
+        """
+        Args:
+            workers (int): Number of worker processes kept ready
+            cpu_seconds (int): CPU seconds one evaluation may use
+            memory_mb (int): Extra memory in MB a worker may allocate
+            timeout (float): Wall-clock seconds to wait for a result
+        """
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_mb * 1024 * 1024
+        self.timeout = timeout
+        # Workers are forked from a single-threaded server process that has the
+        # engine preloaded, so restarts are cheap and never fork a threaded parent
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            self.context = multiprocessing.get_context("forkserver")
+            self.context.set_forkserver_preload([__name__])
+        else:
+            self.context = multiprocessing.get_context()
+
+        self.idle = queue.Queue()
+        for _ in range(workers):
+            self.idle.put(self.spawn())
+        # Threads that wait on workers, so async callers never block the event loop
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="calculator-sandbox")
+
+        self.lock = threading.Lock()
+        self.evaluations = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self.closed = False
+
+    def spawn(self):
+        return SandboxWorker(self.context, self.cpu_seconds, self.memory_bytes)
+
+    def run(self, task, *args, **kwargs):
+        """
+        Run one task in a worker and return its result dict
+
+        Returns None if the task failed, the worker died or it timed out (dead
+        and stuck workers are replaced); the public methods turn that into an
+        error dict.
+        """
+        try:
+            worker = self.idle.get(timeout=self.timeout)
+        except queue.Empty:
+            return None
+
+        result = None
+        healthy = False
+        try:
+            worker.connection.send((task, args, kwargs))
+            if worker.connection.poll(self.timeout):
+                result = worker.connection.recv()
+                healthy = True
+            else:
+                with self.lock:
+                    self.timeouts += 1
+        except (EOFError, OSError):
+            pass  # Killed by an rlimit (SIGXCPU) or crashed
+        finally:
+            if not healthy:
+                worker.kill()
+                worker = self.spawn()
+                with self.lock:
+                    self.restarts += 1
+            with self.lock:
+                self.evaluations += 1
+            self.idle.put(worker)
+
+        return result
+
+    def calculate(self, expression, exact=None):
+        """Sandboxed calculator_tool, same arguments and return value"""
+        result = self.run("calculator", expression, exact)
+        if result is None:
+            return {
+                "result": None,
+                "error": "Calculation took too long or used too much memory",
+                "expression": expression
+            }
+        return {"result": None, "error": None, "expression": expression, **result}
+
+    def calculate_batch(self, expression=None, bindings=None, expressions=None):
+        """Sandboxed calculator_batch, same arguments and return value"""
+        result = self.run("batch", expression=expression, bindings=bindings, expressions=expressions)
+        if result is None:
+            return {
+                "results": [],
+                "errors": {},
+                "error": "Calculation took too long or used too much memory",
+                "expression": expressions if expressions is not None else expression
+            }
+        return {"results": [], "errors": {}, "error": None,
+                "expression": expressions if expressions is not None else expression, **result}
+
+    async def calculate_async(self, expression, exact=None):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.calculate, expression, exact)
+
+    async def calculate_batch_async(self, expression=None, bindings=None, expressions=None):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, lambda: self.calculate_batch(expression, bindings, expressions)
+        )
+
+    def stats(self):
+        """Return evaluation, timeout and worker restart counters"""
+        with self.lock:
+            return {
+                "evaluations": self.evaluations,
+                "timeouts": self.timeouts,
+                "restarts": self.restarts,
+                "idle_workers": self.idle.qsize()
+            }
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.executor.shutdown(wait=True)
+        while not self.idle.empty():
+            self.idle.get_nowait().kill()
+
+
+if __name__ == "__main__":
+    import time
+
+    sandbox = CalculatorSandbox(workers=2, cpu_seconds=1, memory_mb=128, timeout=3.0)
+    for expression in ["2 + 3 * 4", "10 / 0", "9**9**9", "(" * 50 + "1" + ")" * 50]:
+        start = time.time()
+        print(f"{expression[:30]!r}: {sandbox.calculate(expression)} ({time.time() - start:.2f}s)")
+    print(sandbox.stats())
+    sandbox.close()
@@ -0,0 +1,146 @@
+import importlib
+import threading
+import time
+
+# Modules each tool needs, imported on the tool's first use instead of at startup
+TOOL_MODULES = {
+    "calculator": ["src.tools.my_calculator.calculator", "src.tools.my_calculator.batch"],
+    "weather": ["src.tools.check_weather.weather_checking"],
+    "images": ["src.tools.image_crawler.ImageCrawler", "src.tools.image_crawler.download_jobs"],
+}
+
+import_times = {}  # Module name -> seconds its first import took
+import_lock = threading.Lock()
+
+
+class LazyModule:
+    """
+    Stand-in for a module that imports it on first attribute access.
+
+    `calculator = lazy_module("...calculator")` can replace `import ... as calculator`
+    without touching the call sites; the import and its time are recorded once.
+    """
+
+    def __init__(self, name):
+        self.__dict__["name"] = name
+        self.__dict__["module"] = None
+
+    def load(self):
+        module = self.__dict__["module"]
+        if module is None:
+            module = self.__dict__["module"] = import_module(self.__dict__["name"])
+        return module
+
+    def __getattr__(self, attribute):
+        return getattr(self.load(), attribute)
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["module"] is not None else "not loaded"
+        return f"<lazy module {self.__dict__['name']!r} ({state})>"
+
+
+def lazy_module(name):
+    return LazyModule(name)
+
+
+def import_module(name):
+    """importlib.import_module that records how long the first import took"""
+    # Python's per-module import locks make concurrent imports (e.g. a preload) safe
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    with import_lock:
+        import_times.setdefault(name, time.perf_counter() - start)
+    return module
+
+
+def load_tool(tool):
+    """Import every module a tool needs, e.g. to warm it up before its first call"""
+    for name in TOOL_MODULES.get(tool, []):
+        import_module(name)
+
+
+def preload(names, background=True):
+    """
+    Import modules ahead of their first use
+
+    Args:
+        names (list): Module names (or tool names from TOOL_MODULES)
+        background (bool): Import in a daemon thread so startup is not delayed
+    """
+    def run():
+        for name in names:
+            try:
+                if name in TOOL_MODULES:
+                    load_tool(name)
+                else:
+                    import_module(name)
+            except Exception:
+                pass  # The real import at first use reports the error
+
+    if background:
+        threading.Thread(target=run, daemon=True, name="preload").start()
+    else:
+        run()
+
+
+def import_stats():
+    """Seconds spent on each lazily imported module so far"""
+    with import_lock:
+        return {name: round(seconds, 4) for name, seconds in import_times.items()}
+
+
+def measure_startup(module="main", runs=5, top=15):
+    """
+    Startup benchmark: import a module in fresh interpreters with -X importtime
+
+    Args:
+        module (str): Module whose cold import is measured
+        runs (int): Fresh interpreters to average over
+        top (int): Number of slowest top-level imports to report
+
+    Returns:
+        dict: {"total": mean seconds, "modules": [(name, mean cumulative seconds), ...]}
+    """
+    import subprocess
+    import sys
+
+    def top_level_imports(code):
+        output = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            capture_output=True, text=True, check=True
+        ).stderr
+        for line in output.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cumulative, name = line.split("|")
+            if not cumulative.strip().isdigit():
+                continue  # Header line
+            # The measured module has one leading space and its direct imports three
+            if len(name) - len(name.lstrip()) <= 3:
+                yield name.strip(), int(cumulative) / 1e6
+
+    # Modules the interpreter imports on its own (site, encodings, ...) are not startup cost of the module
+    baseline = {name for name, _ in top_level_imports("pass")}
+
+    totals = {}
+    for _ in range(runs):
+        for name, seconds in top_level_imports(f"import {module}"):
+            if name not in baseline:
+                totals[name] = totals.get(name, 0) + seconds
+
+    total = totals.pop(module, 0) / runs
+    slowest = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {"total": round(total, 4), "modules": [(name, round(seconds / runs, 4)) for name, seconds in slowest]}
+
+
+if __name__ == "__main__":
+    result = measure_startup()
+    print(f"import main: {result['total'] * 1000:.1f} ms (mean of 5 cold starts)")
+    for name, seconds in result["modules"]:
+        print(f"  {seconds * 1000:8.1f} ms  {name}")
+
+    print("\nFirst use of each tool:")
+    for tool in TOOL_MODULES:
+        start = time.perf_counter()
+        load_tool(tool)
+        print(f"  {(time.perf_counter() - start) * 1000:8.1f} ms  {tool}")
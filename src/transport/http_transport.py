@@ -0,0 +1,282 @@
+import asyncio
+import random
+import threading
+import time
+import weakref
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (5, 15)
+
+# Responses worth retrying; everything else is returned to the caller as-is
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def backoff_delay(attempt, base=0.5, cap=8.0):
+    """
+    Exponential backoff with full jitter
+
+    Args:
+        attempt (int): Zero-based retry number
+        base (float): Delay of the first retry window in seconds
+        cap (float): Upper bound of the window
+
+    Returns:
+        float: Seconds to sleep before the next attempt
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def retry_after_seconds(response, cap=8.0):
+    """Return the server's Retry-After delay if it sent a usable one"""
+    value = response.headers.get("Retry-After")
+    if value and value.isdigit():
+        return min(cap, float(value))
+    return None
+
+
+class TransportMetrics:
+    """Thread-safe counters shared by the sync and async clients"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.total_latency = 0.0
+
+    def record(self, latency=None, retry=False, failure=False):
+        with self.lock:
+            if latency is not None:
+                self.requests += 1
+                self.total_latency += latency
+            if retry:
+                self.retries += 1
+            if failure:
+                self.failures += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "failures": self.failures,
+                "avg_latency": self.total_latency / self.requests if self.requests else 0.0
+            }
+
+
+class HttpTransport:
+    """
+    Shared requests-based transport for the tools.
+
+    One keep-alive Session with pooled connections, default timeouts, a
+    per-host concurrency limit, and retries with jittered exponential backoff
+    on connection errors and retryable status codes.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=20, per_host_limit=8, timeout=DEFAULT_TIMEOUT,
+                 max_retries=3, backoff_base=0.5, backoff_max=8.0):
+        """
+        :param pool_connections: Number of per-host connection pools to keep
+        :param pool_maxsize: Keep-alive connections kept per host
+        :param per_host_limit: Maximum concurrent requests to one host
+        :param timeout: Default (connect, read) timeout when the caller passes none
+        :param max_retries: Retries after the first attempt
+        :param backoff_base: First backoff window in seconds
+        :param backoff_max: Largest backoff window in seconds
+        """
+        self.timeout = timeout
+        self.per_host_limit = per_host_limit
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                   pool_block=False, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+
+        self.host_slots = {}
+        self.host_slots_lock = threading.Lock()
+        self.metrics = TransportMetrics()
+
+    def host_slot(self, url):
+        host = urlsplit(url).netloc
+        with self.host_slots_lock:
+            if host not in self.host_slots:
+                self.host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self.host_slots[host]
+
+    def request(self, method, url, max_retries=None, **kwargs):
+        """
+        Send a request through the shared session
+
+        Raises the same requests exceptions as requests.request once retries are
+        exhausted; retryable status codes are returned after the last attempt.
+        max_retries overrides the transport's retry count for this call, e.g. 0
+        for requests that have cheaper alternatives than waiting out a backoff.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        if max_retries is None:
+            max_retries = self.max_retries
+
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            try:
+                # For stream=True the slot only covers the request/headers, not the body read
+                with self.host_slot(url):
+                    response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self.metrics.record(latency=time.monotonic() - start, failure=attempt >= max_retries)
+                if attempt >= max_retries:
+                    raise
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+            else:
+                self.metrics.record(latency=time.monotonic() - start)
+                if response.status_code not in RETRY_STATUSES or attempt >= max_retries:
+                    return response
+                delay = retry_after_seconds(response, self.backoff_max) or \
+                    backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                response.close()
+
+            self.metrics.record(retry=True)
+            attempt += 1
+            time.sleep(delay)
+
+    def get(self, url, max_retries=None, **kwargs):
+        return self.request("GET", url, max_retries=max_retries, **kwargs)
+
+    def stats(self):
+        """Request counters plus per-host keep-alive pool usage"""
+        stats = self.metrics.snapshot()
+        pools = {}
+        for key in list(self.adapter.poolmanager.pools.keys()):
+            pool = self.adapter.poolmanager.pools.get(key)
+            if pool is not None:
+                pools[f"{key.key_scheme}://{key.key_host}:{key.key_port}"] = {
+                    "connections_opened": pool.num_connections,
+                    "requests": pool.num_requests,
+                    "idle": pool.pool.qsize() if pool.pool is not None else 0
+                }
+        stats["pools"] = pools
+        return stats
+
+    def close(self):
+        self.session.close()
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """Return the process-wide HttpTransport, creating it on first use"""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = HttpTransport()
+        return _transport
+
+
+# Pool limits and timeouts for the httpx clients used by the OpenAI SDK and async tools
+HTTPX_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=60)
+HTTPX_TIMEOUT = httpx.Timeout(60.0, connect=DEFAULT_TIMEOUT[0])
+
+httpx_metrics = TransportMetrics()
+
+
+def _mark_request_start(request):
+    request.extensions["transport_start"] = time.monotonic()
+
+
+def _record_response(response):
+    start = response.request.extensions.get("transport_start")
+    if start is not None:
+        httpx_metrics.record(latency=time.monotonic() - start)
+
+
+async def _async_mark_request_start(request):
+    _mark_request_start(request)
+
+
+async def _async_record_response(response):
+    _record_response(response)
+
+
+def make_http_client():
+    """Pooled httpx.Client for the OpenAI SDK"""
+    return httpx.Client(
+        limits=HTTPX_LIMITS,
+        timeout=HTTPX_TIMEOUT,
+        event_hooks={"request": [_mark_request_start], "response": [_record_response]}
+    )
+
+
+def make_async_http_client():
+    """Pooled httpx.AsyncClient for the async OpenAI SDK and async tools"""
+    return httpx.AsyncClient(
+        limits=HTTPX_LIMITS,
+        timeout=HTTPX_TIMEOUT,
+        event_hooks={"request": [_async_mark_request_start], "response": [_async_record_response]}
+    )
+
+
+# One AsyncClient per event loop, since pooled connections are bound to their loop
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_http_client():
+    """Return the shared httpx.AsyncClient for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = make_async_http_client()
+        _async_clients[loop] = client
+    return client
+
+
+async def async_request(method, url, client=None, max_retries=3, backoff_base=0.5, backoff_max=8.0, **kwargs):
+    """
+    Async counterpart of HttpTransport.request using the shared AsyncClient
+
+    Raises httpx.TransportError once retries are exhausted; retryable status
+    codes are returned after the last attempt.
+    """
+    client = client or get_async_http_client()
+
+    attempt = 0
+    while True:
+        # Latency is recorded by the client's event hooks
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.TransportError:
+            httpx_metrics.record(failure=attempt >= max_retries)
+            if attempt >= max_retries:
+                raise
+            delay = backoff_delay(attempt, backoff_base, backoff_max)
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt >= max_retries:
+                return response
+            delay = retry_after_seconds(response, backoff_max) or backoff_delay(attempt, backoff_base, backoff_max)
+
+        httpx_metrics.record(retry=True)
+        attempt += 1
+        await asyncio.sleep(delay)
+
+
+async def async_get(url, client=None, **kwargs):
+    return await async_request("GET", url, client=client, **kwargs)
+
+
+def transport_stats():
+    """Metrics for every shared client, for status pages and benchmarks"""
+    return {
+        "requests": get_transport().stats(),
+        "httpx": httpx_metrics.snapshot()
+    }